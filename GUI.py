@@ -1,29 +1,11 @@
 import streamlit as st
-import firebase_admin
-from firebase_admin import credentials, firestore
 import json
-import base64
 import os
+import uuid
 from PIL import Image
-
-# Initialize Firebase using Streamlit secrets
-firebase_credentials = {
-    "type": st.secrets["firebase_credentials"]["type"],
-    "project_id": st.secrets["firebase_credentials"]["project_id"],
-    "private_key_id": st.secrets["firebase_credentials"]["private_key_id"],
-    "private_key": st.secrets["firebase_credentials"]["private_key"].replace("\\n", "\n"),  # Fix private key formatting
-    "client_email": st.secrets["firebase_credentials"]["client_email"],
-    "client_id": st.secrets["firebase_credentials"]["client_id"],
-    "auth_uri": st.secrets["firebase_credentials"]["auth_uri"],
-    "token_uri": st.secrets["firebase_credentials"]["token_uri"],
-    "auth_provider_x509_cert_url": st.secrets["firebase_credentials"]["auth_provider_x509_cert_url"],
-    "client_x509_cert_url": st.secrets["firebase_credentials"]["client_x509_cert_url"]
-}
-if not firebase_admin._apps:
-    cred = credentials.Certificate(firebase_credentials)
-    firebase_admin.initialize_app(cred)
-
-db = firestore.client()
+from assets import set_background
+from responses import RESPONSES_COLLECTION, make_response
+from storage import get_storage
 
 # Define questions for each group
 questions = {
@@ -100,37 +82,17 @@ suppliers = {
     }
 }
 
-# Function to save responses to Firebase
-def save_to_firebase(answers, is_control):
+# Function to save responses to Firebase; the response is stored under submission_id, so
+# saving it twice (a double-clicked Submit) leaves one document
+def save_to_firebase(answers, is_control, submission_id):
     try:
-        user_name = answers.get("Name", "Unknown")
-        collection_name = f"survey_{user_name.replace(' ', '_')}"
         processed_answers = {q: (answers.get(q, "N/A") or "N/A") for q in answers}
-        processed_answers["is_control"] = is_control  # Add is_control field
-        db.collection(collection_name).add(processed_answers)
+        arm = "control" if is_control else "bias"
+        get_storage().put_response(RESPONSES_COLLECTION, submission_id, make_response(arm, processed_answers))
         st.success("Data successfully saved to Firebase!")
     except Exception as e:
         st.error(f"Error saving data: {e}")
 
-# Function to set a background image
-def set_background(image_path):
-    with open(image_path, "rb") as f:
-        img_data = f.read()
-    b64_encoded = base64.b64encode(img_data).decode()
-    st.markdown(
-        f"""
-        <style>
-        .stApp {{
-            background-image: url("data:image/png;base64,{b64_encoded}");
-            background-size: cover;
-            background-position: center;
-            background-repeat: no-repeat;
-        }}
-        </style>
-        """,
-        unsafe_allow_html=True
-    )
-
 # Function to display the header with a logo
 def display_header():
     st.markdown(
@@ -186,6 +148,9 @@ def control_group():
         st.session_state.page = "Page 1"
     if "answers" not in st.session_state:
         st.session_state.answers = {}
+    # One ID per response; the response is stored under it
+    if "submission_id" not in st.session_state:
+        st.session_state.submission_id = str(uuid.uuid4())
 
     # Display scenarios and supplier details
     display_scenarios(is_control=True)
@@ -221,8 +186,9 @@ def control_group():
     
     # Submit button
     if st.session_state.page == "Page 3" and st.button("Submit"):
-        save_to_firebase(st.session_state.answers, is_control=1)
+        save_to_firebase(st.session_state.answers, is_control=1, submission_id=st.session_state.submission_id)
         st.session_state.answers = {}
+        st.session_state.submission_id = str(uuid.uuid4())  # The next response gets its own ID
         st.session_state.page = "Page 1"  # Reset to first page after submission
         st.rerun()
     
@@ -238,6 +204,9 @@ def bias_group():
         st.session_state.page = "Page 1"
     if "answers" not in st.session_state:
         st.session_state.answers = {}
+    # One ID per response; the response is stored under it
+    if "submission_id" not in st.session_state:
+        st.session_state.submission_id = str(uuid.uuid4())
 
     # Display scenarios and supplier details
     display_scenarios(is_control=False)
@@ -273,8 +242,9 @@ def bias_group():
     
     # Submit button
     if st.session_state.page == "Page 3" and st.button("Submit"):
-        save_to_firebase(st.session_state.answers, is_control=0)
+        save_to_firebase(st.session_state.answers, is_control=0, submission_id=st.session_state.submission_id)
         st.session_state.answers = {}
+        st.session_state.submission_id = str(uuid.uuid4())  # The next response gets its own ID
         st.session_state.page = "Page 1"  # Reset to first page after submission
         st.rerun()
     
@@ -282,6 +252,7 @@ def bias_group():
 
 # Main app routing
 def main():
+    get_storage().warm_up()  # Connect to the storage backend in the background
     st.sidebar.title("Navigation")
     app_mode = st.sidebar.radio("Go to", ["Control Group", "Bias Group"])
     if app_mode == "Control Group":
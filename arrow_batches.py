@@ -0,0 +1,123 @@
+import json
+import os
+from datetime import datetime, timezone
+
+import pyarrow as pa
+
+from responses import fold_allocation, from_legacy, is_legacy_collection
+from storage import TIMESTAMP_FIELD, UPDATED_FIELD, StoredDocument, get_storage
+from survey_spec import ALLOCATION_SUPPLIERS, IMPORTANCE_FACTORS, QUESTION_SPEC
+
+# Streaming loader from a collection into Arrow. Documents are read from the backend's
+# scan (Firestore's stream() generator) and converted into RecordBatches of BATCH_SIZE rows
+# against a declared schema, so at most one batch of documents is held in Python at a time
+# and peak memory does not grow with the collection. The dashboard's local copy
+# (response_cache.py) is written from these batches; exports and the whole-collection view
+# read it back batch by batch. Set the batch size with SURVEY_ARROW_BATCH_SIZE.
+BATCH_SIZE = int(os.environ.get("SURVEY_ARROW_BATCH_SIZE", "10000"))
+
+# Fields of a document that have no column of their own are kept as JSON in this column
+OTHER_FIELDS = "other_fields"
+
+# Arrow type of each widget's answer; Q3 (allocation) is one percentage per supplier and
+# Q11 (importance_matrix) one 1-5 rating per factor
+WIDGET_TYPES = {
+    "text": pa.string(),
+    "dropdown": pa.string(),
+    "choice": pa.string(),
+    "allocation": pa.struct([(supplier, pa.int64()) for supplier in ALLOCATION_SUPPLIERS]),
+    "slider": pa.int64(),
+    "importance_matrix": pa.struct([(factor, pa.int8()) for factor in IMPORTANCE_FACTORS]),
+}
+
+# Function to get the declared schema of the canonical responses collection (responses.py)
+def response_schema():
+    return pa.schema(
+        [
+            ("document_id", pa.string()),
+            ("arm", pa.string()),
+            ("schema_version", pa.int64()),
+            (TIMESTAMP_FIELD, pa.timestamp("us", tz="UTC")),
+            (UPDATED_FIELD, pa.timestamp("us", tz="UTC")),
+            ("legacy_collection", pa.string()),
+        ]
+        + [(entry["id"], WIDGET_TYPES[entry["widget"]]) for entry in QUESTION_SPEC]
+        + [(OTHER_FIELDS, pa.string())]
+    )
+
+RESPONSE_SCHEMA = response_schema()
+
+def _to_string(value):
+    return value if value is None or isinstance(value, str) else str(value)
+
+def _to_int(value):
+    try:
+        return None if value is None else int(value)
+    except (TypeError, ValueError):
+        return None
+
+def _to_timestamp(value):
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    if not isinstance(value, datetime):
+        return None
+    return value if value.tzinfo else value.replace(tzinfo=timezone.utc)
+
+# Function to get the function that coerces a stored value to an Arrow type; values that
+# do not fit (e.g. text in a numeric column of an old document) become nulls
+def converter(data_type):
+    if pa.types.is_string(data_type):
+        return _to_string
+    if pa.types.is_integer(data_type):
+        return _to_int
+    if pa.types.is_timestamp(data_type):
+        return _to_timestamp
+    if pa.types.is_struct(data_type):
+        fields = [(field.name, converter(field.type)) for field in data_type]
+        return lambda value: {name: convert(value.get(name)) for name, convert in fields} if isinstance(value, dict) else None
+    raise TypeError(f"No converter for {data_type}")
+
+def _json_default(value):
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+# Function to turn StoredDocuments into RecordBatches of up to batch_size rows. The
+# document_id and updated_at columns come from the stored document. Fields that are not in
+# the schema (e.g. answers keyed by an older wording of a question) go into the
+# OTHER_FIELDS column as JSON if the schema has one, so no answer is lost.
+def to_record_batches(documents, schema=RESPONSE_SCHEMA, batch_size=BATCH_SIZE):
+    converters = [(field.name, converter(field.type)) for field in schema if field.name != OTHER_FIELDS]
+    names = set(schema.names)
+    columns = {name: [] for name in schema.names}
+    rows = 0
+    for stored in documents:
+        data = fold_allocation(stored.data)
+        for name, convert in converters:
+            if name == "document_id":
+                value = stored.id
+            elif name == UPDATED_FIELD:
+                value = stored.updated_at
+            else:
+                value = data.get(name)
+            columns[name].append(convert(value))
+        if OTHER_FIELDS in names:
+            other = {key: value for key, value in data.items() if key not in names}
+            columns[OTHER_FIELDS].append(json.dumps(other, default=_json_default, ensure_ascii=False) if other else None)
+        rows += 1
+        if rows == batch_size:
+            yield pa.RecordBatch.from_pydict(columns, schema=schema)
+            columns = {name: [] for name in schema.names}
+            rows = 0
+    if rows:
+        yield pa.RecordBatch.from_pydict(columns, schema=schema)
+
+# Function to stream a collection from the storage backend as RecordBatches, or only the
+# documents written after `since`; legacy collections are converted to the canonical layout
+def stream_record_batches(collection_name, since=None, schema=RESPONSE_SCHEMA, batch_size=BATCH_SIZE):
+    storage = get_storage()
+    documents = storage.scan_documents(collection_name) if since is None else storage.scan_since(collection_name, since)
+    if is_legacy_collection(collection_name):
+        documents = (StoredDocument(stored.id, from_legacy(collection_name, stored.data), stored.updated_at) for stored in documents)
+    return to_record_batches(documents, schema, batch_size)
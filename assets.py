@@ -0,0 +1,175 @@
+import base64
+import io
+import json
+import mimetypes
+import os
+import threading
+
+import streamlit as st
+from PIL import Image, ImageFilter
+
+# Manifest written by build_assets.py and the variant width picked for inline backgrounds
+ASSET_MANIFEST_PATH = os.path.join("static", "asset-manifest.json")
+STATIC_URL_PREFIX = "app/static/"
+# "static" references built variants by URL (cacheable), "inline" embeds a base64 data URI
+ASSET_MODE = os.environ.get("SURVEY_ASSET_MODE", "static")
+BACKGROUND_WIDTH = int(os.environ.get("SURVEY_BACKGROUND_WIDTH", "1280"))
+PREFERRED_FORMATS = ("webp", "jpeg")
+# Low-quality placeholder: a tiny blurred JPEG inlined under the full background
+PLACEHOLDER_WIDTH = 24
+PLACEHOLDER_QUALITY = 40
+
+_manifest = {"mtime": None, "images": {}}
+
+# Process-wide cache of prebuilt background <style> blocks, keyed by (mode, asset, version)
+_background_css = {}
+_background_lock = threading.Lock()
+
+# Hit/miss counters so we can confirm the disk read and encode leave the rerun path
+cache_stats = {"hits": 0, "misses": 0}
+
+# Function to load the built asset manifest, reloading only when the file changes
+def load_asset_manifest():
+    try:
+        mtime = os.path.getmtime(ASSET_MANIFEST_PATH)
+    except OSError:
+        return {}
+    if _manifest["mtime"] != mtime:
+        with open(ASSET_MANIFEST_PATH) as f:
+            _manifest["images"] = json.load(f).get("images", {})
+        _manifest["mtime"] = mtime
+    return _manifest["images"]
+
+# Function to pick the best built variant of an image, falling back to the original
+def resolve_asset(image_path, width=None, formats=PREFERRED_FORMATS):
+    entry = load_asset_manifest().get(image_path)
+    if not entry:
+        return image_path
+    width = width or BACKGROUND_WIDTH
+    output_dir = os.path.dirname(ASSET_MANIFEST_PATH)
+    for fmt in formats:
+        candidates = [v for v in entry["variants"] if v["format"] == fmt]
+        if not candidates:
+            continue
+        # Smallest variant at least as wide as requested, else the widest available
+        wide_enough = [v for v in candidates if v["width"] >= width]
+        variant = min(wide_enough, key=lambda v: v["width"]) if wide_enough else max(candidates, key=lambda v: v["width"])
+        variant_path = os.path.join(output_dir, variant["file"])
+        if os.path.exists(variant_path):
+            return variant_path
+    return image_path
+
+# Build the <style> block that sets an image as the app background
+def _build_background_css(image_path):
+    with open(image_path, "rb") as f:
+        img_data = f.read()
+    b64_encoded = base64.b64encode(img_data).decode()
+    mime_type = mimetypes.guess_type(image_path)[0] or "image/jpeg"
+    return f"""
+        <style>
+        .stApp {{
+            background-image: url("data:{mime_type};base64,{b64_encoded}");
+            background-size: cover;
+            background-position: center;
+            background-repeat: no-repeat;
+        }}
+        </style>
+        """
+
+# Function to build the blurred placeholder as a data URI (a few hundred bytes)
+def build_placeholder_data_uri(image_path):
+    with Image.open(image_path) as image:
+        image = image.convert("RGB")
+        height = max(1, round(image.height * PLACEHOLDER_WIDTH / image.width))
+        thumbnail = image.resize((PLACEHOLDER_WIDTH, height), Image.LANCZOS)
+        thumbnail = thumbnail.filter(ImageFilter.GaussianBlur(1))
+        buffer = io.BytesIO()
+        thumbnail.save(buffer, "JPEG", quality=PLACEHOLDER_QUALITY, optimize=True)
+    return f"data:image/jpeg;base64,{base64.b64encode(buffer.getvalue()).decode()}"
+
+# Function to build the URL of a built variant served by Streamlit's static file serving.
+# The "v" query argument makes tornado send a far-future Cache-Control header; the
+# content hash in the file name keeps that safe, and tornado adds an ETag.
+def static_url(variant):
+    return f"{STATIC_URL_PREFIX}{variant['file']}?v={variant['hash']}"
+
+# Function to get the image-set() value for one width, WebP first with a JPEG fallback
+def _image_set(variants):
+    urls = [f'url("{static_url(v)}") type("{mimetypes.guess_type(v["file"])[0]}")' for v in variants]
+    return f"image-set({', '.join(urls)})"
+
+# Build the <style> block that references the built variants by URL, one per viewport width.
+# With a placeholder, the blurred thumbnail is the bottom background layer: it paints
+# immediately from the inline CSS and the full image covers it once downloaded.
+def _build_static_background_css(image_path, placeholder=False):
+    variants = load_asset_manifest()[image_path]["variants"]
+    under = ", var(--survey-placeholder)" if placeholder else ""
+    placeholder_var = f"""
+            --survey-placeholder: url("{build_placeholder_data_uri(image_path)}");""" if placeholder else ""
+    widths = sorted({v["width"] for v in variants})
+    rules = []
+    for i, width in enumerate(widths):
+        at_width = [v for v in variants if v["width"] == width]
+        at_width.sort(key=lambda v: PREFERRED_FORMATS.index(v["format"]) if v["format"] in PREFERRED_FORMATS else len(PREFERRED_FORMATS))
+        fallback = at_width[-1]
+        rule = f"""
+        .stApp {{
+            background-image: url("{static_url(fallback)}"){under};
+            background-image: {_image_set(at_width)}{under};
+        }}"""
+        if i > 0:
+            rule = f"""
+        @media (min-width: {widths[i - 1] + 1}px) {{{rule}
+        }}"""
+        rules.append(rule)
+    return f"""
+        <style>
+        .stApp {{{placeholder_var}
+            background-size: cover;
+            background-position: center;
+            background-repeat: no-repeat;
+        }}{"".join(rules)}
+        </style>
+        """
+
+# Function to tell whether the static mode can be used for an image
+def _use_static(image_path, mode):
+    if (mode or ASSET_MODE) != "static" or image_path not in load_asset_manifest():
+        return False
+    # Without static serving the URLs would 404, so fall back to inlining
+    return bool(st.get_option("server.enableStaticServing"))
+
+# Function to return a cached CSS string, building it on a miss
+def _cached_css(key, build):
+    css = _background_css.get(key)
+    if css is not None:
+        cache_stats["hits"] += 1
+        return css
+
+    with _background_lock:
+        css = _background_css.get(key)
+        if css is None:
+            cache_stats["misses"] += 1
+            css = build()
+            # Drop entries for older versions of the same asset
+            for old_key in [k for k in _background_css if k[:2] == key[:2]]:
+                del _background_css[old_key]
+            _background_css[key] = css
+        else:
+            cache_stats["hits"] += 1
+    return css
+
+# Function to get the background CSS, building it once per process.
+# placeholder=True only applies in static mode; inline backgrounds arrive with the CSS anyway.
+def get_background_css(image_path, mode=None, placeholder=False):
+    if _use_static(image_path, mode):
+        key = ("static", (image_path, placeholder), (_manifest["mtime"], os.path.getmtime(image_path)))
+        return _cached_css(key, lambda: _build_static_background_css(image_path, placeholder))
+
+    resolved = resolve_asset(image_path)
+    key = ("inline", os.path.abspath(resolved), os.path.getmtime(resolved))
+    return _cached_css(key, lambda: _build_background_css(resolved))
+
+# Function to set a background image
+def set_background(image_path, mode=None, placeholder=False):
+    st.markdown(get_background_css(image_path, mode, placeholder), unsafe_allow_html=True)
@@ -0,0 +1,92 @@
+import multiprocessing
+import os
+import resource
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+# Benchmark: peak memory of loading a synthetic collection of response documents
+#   list    every document as a dict, then one DataFrame (how fetch_data() used to load)
+#   batches arrow_batches.to_record_batches(), consuming one RecordBatch at a time
+#   table   the same batches collected into one pa.Table (columnar copy only)
+#
+#   python benchmarks/bench_arrow_batches.py [rows] [batch_size]
+#
+# Documents come from a generator, the way Firestore's stream() yields them, so nothing
+# is stored up front. Each approach runs in a fresh process; peak memory is the process's
+# maximum resident set size, reported above the size after imports.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_ROWS = 1_000_000
+APPROACHES = ("list", "batches", "table")
+
+# Function to generate `rows` StoredDocuments shaped like canonical responses
+def synthetic_documents(rows):
+    from storage import StoredDocument
+    from survey_spec import IMPORTANCE_FACTORS
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    for i in range(rows):
+        submitted_at = start + timedelta(seconds=i)
+        yield StoredDocument(f"response-{i:08d}", {
+            "arm": "bias" if i % 2 else "control",
+            "schema_version": 2,
+            "submitted_at": submitted_at,
+            "updated_at": submitted_at,
+            "first_name": f"Respondent {i}",
+            "last_name": "Example",
+            "email": f"respondent{i}@example.com",
+            "designation": "Supply Chain Analyst",
+            "Q1": "Supplier B",
+            "Q2": i % 10 + 1,
+            "Q3": {"Supplier A": 50, "Supplier B": 30, "Supplier C": 20},
+            "Q4": i % 5 + 1,
+            "Q5": (i + 1) % 5 + 1,
+            "Q6": (i + 2) % 5 + 1,
+            "Q7": (i + 3) % 5 + 1,
+            "Q8": "Yes",
+            "Q9": "No",
+            "Q10": "Somewhat",
+            "Q11": {factor: (i + j) % 5 + 1 for j, factor in enumerate(IMPORTANCE_FACTORS)},
+            "Q12": "Agree",
+            "Q13": "Neutral",
+            "Q14": "Disagree",
+        }, submitted_at)
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+# Runs one approach in the current (fresh) process and reports (baseline MB, peak MB, seconds, rows)
+def measure(approach, rows, batch_size, results):
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    import pandas as pd
+    import pyarrow as pa
+    from arrow_batches import RESPONSE_SCHEMA, to_record_batches
+    baseline = peak_rss_mb()
+    started = time.perf_counter()
+    documents = synthetic_documents(rows)
+    if approach == "list":
+        data = [stored.data for stored in documents]
+        loaded = len(pd.DataFrame(data))
+    elif approach == "batches":
+        loaded = sum(batch.num_rows for batch in to_record_batches(documents, RESPONSE_SCHEMA, batch_size))
+    else:
+        loaded = pa.Table.from_batches(to_record_batches(documents, RESPONSE_SCHEMA, batch_size), RESPONSE_SCHEMA).num_rows
+    results.put((approach, baseline, peak_rss_mb(), time.perf_counter() - started, loaded))
+
+def main(rows=DEFAULT_ROWS, batch_size=None):
+    sys.path.insert(0, ROOT)
+    from arrow_batches import BATCH_SIZE
+    rows, batch_size = int(rows), int(batch_size or BATCH_SIZE)
+    context = multiprocessing.get_context("spawn")
+    results = context.Queue()
+    print(f"{rows} documents, batches of {batch_size}")
+    for approach in APPROACHES:
+        process = context.Process(target=measure, args=(approach, rows, batch_size, results))
+        process.start()
+        name, baseline, peak, seconds, loaded = results.get()
+        process.join()
+        print(f"{name:8} peak {peak - baseline:7.0f} MB above baseline ({peak:.0f} MB RSS), {seconds:.1f} s, {loaded} rows")
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,118 @@
+import os
+import sys
+import threading
+import time
+
+# Benchmark: submission throughput, Firestore RPC count and how long Submit blocks, for
+# the old write path vs the batching SubmissionWriter, against a fake Firestore client that
+# charges a fixed latency per RPC.
+#
+#   python benchmarks/bench_batched_writes.py [submissions] [sessions] [rpc_latency_ms]
+#
+# `sessions` threads submit concurrently, as during a mailing-list blast.
+#   before: each session calls collection.add() on its own thread and waits for it, the
+#           way the survey apps wrote before the writer existed
+#   after:  each session calls SubmissionWriter.submit(); the writer's threads commit
+#           batches through FirestoreStorage.bulk_put()
+# No outbox is used, so only the Firestore side is measured.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Fake of the parts of the Firestore client the writer uses. Each commit is one RPC that
+# sleeps for the RPC latency plus a small per-write cost.
+class FakeFirestore:
+    def __init__(self, rpc_latency, write_latency=0.00005):
+        self.rpc_latency = rpc_latency
+        self.write_latency = write_latency
+        self.rpcs = 0
+        self.documents = 0
+        self._lock = threading.Lock()
+
+    def collection(self, name):
+        return FakeCollection(self, name)
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def commit(self, writes):
+        time.sleep(self.rpc_latency + self.write_latency * len(writes))
+        with self._lock:
+            self.rpcs += 1
+            self.documents += len(writes)
+
+class FakeCollection:
+    def __init__(self, db, name):
+        self._db = db
+        self.name = name
+
+    def document(self, document_id=None):
+        return (self.name, document_id)
+
+    # One RPC per document, as in the old path
+    def add(self, document):
+        self._db.commit([((self.name, None), document)])
+
+class FakeBatch:
+    def __init__(self, db):
+        self._db = db
+        self._writes = []
+
+    def set(self, reference, document, merge=False):
+        self._writes.append((reference, document))
+
+    def commit(self):
+        self._db.commit(self._writes)
+
+# Function to push `submissions` documents from `sessions` threads, each calling
+# submit(document) per submission; returns (seconds until all were written, mean seconds
+# one submit() call blocked)
+def push(submit, submissions, sessions):
+    document = {f"Q{i}": "Supplier A" for i in range(1, 15)}
+    blocked = []
+
+    def session(count):
+        for _ in range(count):
+            started = time.perf_counter()
+            submit(dict(document))
+            blocked.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=session, args=(submissions // sessions,)) for _ in range(sessions)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return time.perf_counter() - started, sum(blocked) / len(blocked)
+
+# Old path: every session writes its own document with collection.add()
+def run_before(submissions, sessions, rpc_latency):
+    db = FakeFirestore(rpc_latency)
+    elapsed, blocked = push(lambda document: db.collection("survey_bais").add(document), submissions, sessions)
+    return elapsed, blocked, db
+
+# Current path: sessions hand documents to the writer, which commits them in batches
+def run_after(submissions, sessions, rpc_latency):
+    from storage import FirestoreStorage
+    from submissions import SubmissionWriter
+
+    db = FakeFirestore(rpc_latency)
+    writer = SubmissionWriter(write_batch=FirestoreStorage(db=db).bulk_put, queue_size=submissions)
+    started = time.perf_counter()
+    _, blocked = push(lambda document: writer.submit("responses", document), submissions, sessions)
+    writer.shutdown(timeout=600)
+    return time.perf_counter() - started, blocked, db
+
+def main(submissions="2000", sessions="50", rpc_latency_ms="30"):
+    sys.path.insert(0, ROOT)
+    submissions, sessions = int(submissions), int(sessions)
+    rpc_latency = float(rpc_latency_ms) / 1000
+    for label, run in (("before (add() per session)", run_before), ("after (batching writer)", run_after)):
+        elapsed, blocked, db = run(submissions, sessions, rpc_latency)
+        print(
+            f"{label}: {db.documents} documents in {elapsed:.2f}s ({db.documents / elapsed:.0f}/s), "
+            f"{db.rpcs} RPCs ({db.documents / db.rpcs:.1f} writes per commit), "
+            f"Submit blocked {blocked * 1000:.1f} ms on average"
+        )
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,89 @@
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+
+# Benchmark: cold start of the survey entry point (main.py).
+#
+#   python benchmarks/bench_cold_start.py [bias|control] [repeats]
+#
+# "server boot" is the time from launching `streamlit run main.py` until the health
+# endpoint answers. "first session" is the first script run of main.py in a fresh
+# process (nothing imported yet), i.e. the time until the first page is rendered, and
+# lists the heavy modules that run had to import. Each measurement runs in its own
+# process so no module is already cached in sys.modules. The in-memory storage backend is
+# used so nothing talks to Firestore.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIRST_SESSION_SCRIPT = """
+import sys
+import time
+
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+
+at = AppTest.from_file("main.py", default_timeout=60)
+at.session_state["selected_app"] = "{arm}"
+at.run()
+elapsed = time.perf_counter() - start
+assert not at.exception, at.exception
+loaded = [m for m in ("bias_test", "control_group_app", "firebase_admin", "pandas") if m in sys.modules]
+print(elapsed, ",".join(loaded))
+"""
+
+# Function to get a free local port for the server
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+# Function to time one server boot until /_stcore/health responds
+def server_boot():
+    port = free_port()
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", "main.py", "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        cwd=ROOT,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - start
+            except OSError:
+                time.sleep(0.02)
+    finally:
+        server.terminate()
+        server.wait()
+
+# Function to time the first script run in a fresh process
+def first_session(arm):
+    output = subprocess.run(
+        [sys.executable, "-c", FIRST_SESSION_SCRIPT.format(arm=arm)],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.split()
+    return float(output[0]), output[1] if len(output) > 1 else ""
+
+def main(arm="bias", repeats="5"):
+    os.environ["SURVEY_STORAGE_BACKEND"] = "memory"
+    repeats = int(repeats)
+    boots = sorted(server_boot() for _ in range(repeats))
+    print(f"server boot: median {boots[len(boots) // 2] * 1000:.0f} ms over {repeats} runs")
+
+    sessions = [first_session(arm) for _ in range(repeats)]
+    times = sorted(t for t, _ in sessions)
+    print(f"first session ({arm}): median {times[len(times) // 2] * 1000:.0f} ms to first render over {repeats} runs")
+    print(f"modules imported by the first session: {sessions[-1][1] or 'none'}")
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
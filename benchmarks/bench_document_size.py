@@ -0,0 +1,69 @@
+import json
+import os
+import sys
+
+# Benchmark: size of one stored response with answers keyed by full question text (schema
+# version 1) vs keyed by question ID (the codebook layout), for each study arm.
+#
+#   python benchmarks/bench_document_size.py
+#
+# Sizes are the JSON encoding and Firestore's storage size for the document, computed
+# with the rules in https://firebase.google.com/docs/firestore/storage-size. Every
+# question is answered with its longest option so the numbers are an upper bound.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Function to compute Firestore's storage size of a value
+def firestore_size(value):
+    if isinstance(value, str):
+        return len(value.encode("utf-8")) + 1
+    if isinstance(value, bool) or value is None:
+        return 1
+    if isinstance(value, (int, float)):
+        return 8
+    if isinstance(value, dict):
+        return sum(firestore_size(key) + firestore_size(item) for key, item in value.items())
+    raise TypeError(type(value))
+
+# Function to compute a document's storage size: its name in responses/<uuid>, its fields, plus 32 bytes
+def document_size(document):
+    name = len("responses".encode()) + 1 + 36 + 1 + 16
+    return name + firestore_size(document) + 32
+
+# Function to answer every question of an arm the way the survey stores it (text keys)
+def full_answers(arm):
+    from survey_spec import PAGES
+    answers = {}
+    for page in PAGES[arm].values():
+        for question in page:
+            if question.widget == "text":
+                answers[question.text] = "Ann Example"
+            elif question.widget in ("choice", "dropdown"):
+                answers[question.text] = max(question.options, key=len)
+            elif question.widget == "slider":
+                answers[question.text] = question.params["max_value"]
+            elif question.widget == "allocation":
+                # The allocation widget stores one answer per supplier
+                for supplier, percent in zip(("Supplier A", "Supplier B", "Supplier C"), (50, 30, 20)):
+                    answers[f"{supplier}: in %"] = percent
+            elif question.widget == "importance_matrix":
+                answers[question.text] = {factor: 5 for factor in question.options}
+    return answers
+
+def main():
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    from responses import make_response
+    for arm in ("bias", "control"):
+        answers = full_answers(arm)
+        by_text = {**answers, "arm": arm, "schema_version": 1}
+        by_id = make_response(arm, answers)
+        text_json, id_json = len(json.dumps(by_text).encode()), len(json.dumps(by_id).encode())
+        text_size, id_size = document_size(by_text), document_size(by_id)
+        print(
+            f"{arm}: Firestore {text_size} -> {id_size} bytes ({text_size - id_size} saved, "
+            f"{100 * (text_size - id_size) / text_size:.0f}%); JSON {text_json} -> {id_json} bytes"
+        )
+
+if __name__ == "__main__":
+    main()
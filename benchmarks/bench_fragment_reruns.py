@@ -0,0 +1,72 @@
+import os
+import statistics
+import sys
+import time
+
+from streamlit.testing.v1 import AppTest
+
+# Benchmark: script-run time per slider interaction on the Q3 allocation sliders (Page 2)
+# and the Q11 importance matrix (Page 4).
+#
+#   python benchmarks/bench_fragment_reruns.py [bias_test.py|control_group_app.py] [iterations]
+#
+# "full rerun" is what every slider drag cost before these widgets became fragments: AppTest
+# always re-executes the whole script. "fragment rerun" executes only the fragment function,
+# which is what Streamlit runs for an interaction inside an st.fragment.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FRAGMENT_SCRIPT = """
+import streamlit as st
+import {module} as app
+import survey_widgets
+from survey_spec import PAGES
+
+st.session_state.setdefault("answers", {{}})
+st.session_state.setdefault("page", "{page}")
+q = next(q for q in PAGES[app.ARM]["{page}"] if q.widget == "{widget}")
+{call}
+"""
+
+# name: (page, widget type in the spec, fragment call)
+CASES = {
+    "Q3 allocation sliders": ("Page 2", "allocation", "survey_widgets.display_percentage_allocation_sliders()"),
+    "Q11 importance matrix": ("Page 4", "importance_matrix", "survey_widgets.display_importance_ratings_matrix(q.text, list(q.options), key=q.text)"),
+}
+
+# Function to time repeated runs of an AppTest, moving one slider each time
+def time_runs(at, slider_key, iterations):
+    at.run()
+    timings = []
+    for i in range(iterations):
+        slider = at.slider(key=slider_key)
+        slider.set_value(slider.min + (i % 2) * slider.step)
+        start = time.perf_counter()
+        at.run()
+        timings.append(time.perf_counter() - start)
+        if at.exception:
+            raise RuntimeError(at.exception)
+    return statistics.median(timings) * 1000
+
+def main(app_file="bias_test.py", iterations=20):
+    iterations = int(iterations)
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    module = os.path.splitext(app_file)[0]
+    from survey_spec import IMPORTANCE_FACTORS, PAGES
+    arm = __import__(module).ARM
+    for name, (page, widget, call) in CASES.items():
+        question = next(q for q in PAGES[arm][page] if q.widget == widget)
+        slider_key = "supplier_a_slider" if widget == "allocation" else f"{question.text}_{IMPORTANCE_FACTORS[-1]}"
+
+        full = AppTest.from_file(app_file, default_timeout=60)
+        full.session_state["page"] = page
+        full_ms = time_runs(full, slider_key, iterations)
+
+        fragment = AppTest.from_string(FRAGMENT_SCRIPT.format(module=module, page=page, widget=widget, call=call), default_timeout=60)
+        fragment_ms = time_runs(fragment, slider_key, iterations)
+
+        print(f"{name}: full rerun {full_ms:.1f} ms, fragment rerun {fragment_ms:.1f} ms per interaction (median of {iterations})")
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,133 @@
+import json
+import os
+import subprocess
+import sys
+
+from streamlit.testing.v1 import AppTest
+
+# Benchmark: full script runs needed to complete the survey once, answering every question.
+#
+#   python benchmarks/bench_survey_reruns.py [bias_test.py|control_group_app.py]
+#
+# Runs the walk twice, once per SURVEY_FORM_MODE setting (each in a fresh process, since
+# the flag is read at import). Widget changes outside a form each cost one run; in form
+# mode they cost nothing until the page is submitted.
+#
+# Also a check: every Previous, Next and Submit click must cost exactly one script run and
+# the walk must end on the Success page; otherwise the script exits with status 1.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Wraps the survey so every script run bumps a counter in session state. Submissions are
+# discarded, and main() selects the in-memory storage backend so nothing talks to Firestore.
+COUNTING_SCRIPT = """
+import streamlit as st
+import {module} as app
+
+app.save_to_firebase = lambda answers, submission_id=None: None
+st.session_state["script_runs"] = st.session_state.get("script_runs", 0) + 1
+st.session_state.setdefault("page", "{page}")
+app.main()
+"""
+
+PAGE_BUTTONS = [("Page 1", "Next"), ("Page 2", "Next"), ("Page 3", "Next"), ("Page 4", "Next"), ("Page 5", "Submit")]
+ALLOCATION = {"supplier_a_slider": 50, "supplier_b_slider": 30, "supplier_c_slider": 20}
+
+# Function to change every widget on the current page, then press the navigation button.
+# Returns the number of script runs the navigation click itself cost.
+def answer_page(at, form_mode, button_label):
+    from survey_spec import FORM_MODE
+    assert FORM_MODE == form_mode
+    kinds = ("text_input", "radio", "selectbox", "slider")
+    keys = [(kind, widget.key) for kind in kinds for widget in getattr(at, kind)]
+    for kind, key in keys:
+        # Look widgets up again after every run; element handles do not survive a rerun
+        widget = getattr(at, kind)(key=key)
+        if kind == "text_input":
+            widget.input("Ann")
+        elif kind == "slider" and key in ALLOCATION:
+            widget.set_value(ALLOCATION[key])
+        elif kind == "slider":
+            widget.set_value(widget.max)
+        else:
+            widget.set_value(widget.options[-1])
+        if not form_mode:
+            at.run()
+    runs_before_click = at.session_state["script_runs"]
+    button = next(b for b in at.button if b.label == button_label)
+    button.click()
+    at.run()
+    if at.exception:
+        raise RuntimeError(at.exception)
+    if any("⚠️" in m.value for m in at.markdown):
+        raise RuntimeError(f"validation failed on {at.session_state['page']}")
+    return at.session_state["script_runs"] - runs_before_click
+
+# Function to walk the whole survey and return the script runs it took, the runs each
+# Next/Submit click cost, and the final page. Each page is
+# walked in a fresh AppTest (AppTest keeps stale elements when a page rerun renders a
+# shorter page). The run that renders a page is the last run of the previous page's
+# navigation, so only the very first page load is counted on its own.
+def run_walk(app_file, form_mode):
+    module = os.path.splitext(app_file)[0]
+    total_runs = 1
+    navigation_runs = []
+    for page, button_label in PAGE_BUTTONS:
+        at = AppTest.from_string(COUNTING_SCRIPT.format(module=module, page=page), default_timeout=60)
+        at.run()
+        navigation_runs.append(answer_page(at, form_mode, button_label))
+        total_runs += at.session_state["script_runs"] - 1
+    return total_runs, navigation_runs, at.session_state["page"]
+
+# Function to click Previous on every page after the first; returns {page: script runs the
+# click cost}. A click that does not land on the page before counts as a failure (None).
+def run_previous_clicks(app_file):
+    module = os.path.splitext(app_file)[0]
+    pages = [page for page, _ in PAGE_BUTTONS]
+    runs = {}
+    for previous_page, page in zip(pages, pages[1:]):
+        at = AppTest.from_string(COUNTING_SCRIPT.format(module=module, page=page), default_timeout=60)
+        at.run()
+        runs_before_click = at.session_state["script_runs"]
+        next(b for b in at.button if b.label == "Previous").click()
+        at.run()
+        landed = not at.exception and at.session_state["page"] == previous_page
+        runs[page] = at.session_state["script_runs"] - runs_before_click if landed else None
+    return runs
+
+def main(app_file="bias_test.py", form_mode=None):
+    os.environ["SURVEY_STORAGE_BACKEND"] = "memory"
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    if form_mode is not None:
+        runs, navigation_runs, page = run_walk(app_file, form_mode == "1")
+        previous_runs = run_previous_clicks(app_file)
+        print(json.dumps({"runs": runs, "navigation": navigation_runs, "previous": previous_runs, "page": page}))
+        return
+    failures = []
+    for mode in ("0", "1"):
+        output = subprocess.run(
+            [sys.executable, __file__, app_file, mode],
+            env={**os.environ, "SURVEY_FORM_MODE": mode},
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.splitlines()[-1]
+        result = json.loads(output)
+        label = "form mode" if mode == "1" else "per-widget reruns"
+        print(
+            f"{app_file} ({label}): {result['runs']} script runs per completed survey, "
+            f"{max(result['navigation'])} per navigation event, ended on {result['page']}"
+        )
+        clicks = [(f"{button} on {page}", runs) for (page, button), runs in zip(PAGE_BUTTONS, result["navigation"])]
+        clicks += [(f"Previous on {page}", runs) for page, runs in result["previous"].items()]
+        failures += [f"{label}: {click} cost {runs} script runs, expected 1" for click, runs in clicks if runs != 1]
+        if result["page"] != "Success":
+            failures.append(f"{label}: the walk ended on {result['page']}, expected Success")
+    for failure in failures:
+        print(f"FAIL {failure}")
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
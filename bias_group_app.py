@@ -1,10 +1,9 @@
 import streamlit as st
-from firebase_config import initialize_firebase
-import base64
-import pandas as pd
-
-# Initialize Firebase
-db = initialize_firebase()
+import uuid
+from responses import RESPONSES_COLLECTION, make_response
+from storage import get_storage
+from assets import set_background
+from html_fragments import SUPPLIER_TABLE_CSS, render_supplier_details
 
 # Questions for Bias Group
 questions = {
@@ -74,42 +73,19 @@ suppliers = {
     }
 }
 
-# Convert supplier data to a pandas DataFrame
-suppliers_df = pd.DataFrame(suppliers)
-suppliers_df.index.name = "Feature"
-suppliers_df.reset_index(inplace=True)
+# Supplier table rendered once per process; it never depends on session state
+SUPPLIER_DETAILS_HTML = render_supplier_details(suppliers)
 
-# Function to save responses to Firebase
-def save_to_firebase(answers):
+# Function to save responses to Firebase; the response is stored under submission_id, so
+# saving it twice (a double-clicked Submit) leaves one document
+def save_to_firebase(answers, submission_id):
     try:
-        user_name = answers.get("First Name (Mandatory)", "Unknown")
-        collection_name = f"survey_{user_name.replace(' ', '_')}"
         processed_answers = {q: (answers.get(q, "N/A") or "N/A") for q in answers}
-        processed_answers["is_control"] = False  # Mark as Bias Group
-        db.collection(collection_name).add(processed_answers)
+        get_storage().put_response(RESPONSES_COLLECTION, submission_id, make_response("bias", processed_answers))
         st.success("Data successfully saved to Firebase!")
     except Exception as e:
         st.error(f"Error saving data: {e}")
 
-# Function to set a background image
-def set_background(image_path):
-    with open(image_path, "rb") as f:
-        img_data = f.read()
-    b64_encoded = base64.b64encode(img_data).decode()
-    st.markdown(
-        f"""
-        <style>
-        .stApp {{
-            background-image: url("data:image/png;base64,{b64_encoded}");
-            background-size: cover;
-            background-position: center;
-            background-repeat: no-repeat;
-        }}
-        </style>
-        """,
-        unsafe_allow_html=True
-    )
-
 # Function to display the header with a logo
 def display_header():
     st.markdown(
@@ -122,19 +98,10 @@ def display_header():
         unsafe_allow_html=True
     )
 
-# Function to encode local image to Base64
-def get_image_base64(image_path):
-    with open(image_path, "rb") as image_file:
-        return base64.b64encode(image_file.read()).decode("utf-8")
-
 # Function to display the footer with developer details
 def display_footer():
-    # Encode the local image to Base64
-    image_path = "1705048040202.jpeg"  # Path to the local image
-    image_base64 = get_image_base64(image_path)
-
     st.markdown(
-        f"""
+        """
         <div style="text-align: center; padding: 10px; background-color: rgba(255, 255, 255); border-radius: 10px; margin-top: 20px;">
             <p style="color: black;">© 2025 RWTH Aachen University. All rights reserved.</p>
         </div>
@@ -163,33 +130,8 @@ def display_supplier_details():
         """,
         unsafe_allow_html=True
     )
-    # Convert the DataFrame to HTML and inject custom CSS for the table
-    table_html = suppliers_df.to_html(index=False, escape=False)
-    st.markdown(
-        f"""
-        <div style="padding: 10px; background-color: rgba(255, 255, 255); border-radius: 10px; margin-bottom: 10px;">
-            <style>
-            table {{
-                width: 100%;
-                border-collapse: collapse;
-                background-color: rgba(255, 255, 255);
-            }}
-            th, td {{
-                padding: 8px;
-                text-align: left;
-                border-bottom: 1px solid #ddd;
-                color: black; /* Ensure text color is black */
-            }}
-            th {{
-                background-color: rgba(255, 255, 255);
-                color: black; /* Ensure header text color is black */
-            }}
-            </style>
-            {table_html}
-        </div>
-        """,
-        unsafe_allow_html=True
-    )
+    st.markdown(f"<style>{SUPPLIER_TABLE_CSS}</style>", unsafe_allow_html=True)
+    st.markdown(SUPPLIER_DETAILS_HTML, unsafe_allow_html=True)
 
 # Function to display scenarios
 def display_scenario():
@@ -412,6 +354,7 @@ def display_importance_ratings(question, factors, key):
 
 # Main function for Bias Group
 def bias_group():
+    get_storage().warm_up()  # Connect to the storage backend in the background
     set_background("rwth-aachen.jpg")  # Background image
     display_header()
 
@@ -430,6 +373,9 @@ def bias_group():
         st.session_state.page = "Page 1"
     if "answers" not in st.session_state:
         st.session_state.answers = {}
+    # One ID per response; the response is stored under it
+    if "submission_id" not in st.session_state:
+        st.session_state.submission_id = str(uuid.uuid4())
 
     # Display scenario on the first page only
     if st.session_state.page == "Page 1":
@@ -548,8 +494,9 @@ def bias_group():
     
     # Submit button
     if st.session_state.page == "Page 6: Long-term Considerations" and st.button("Submit"):
-        save_to_firebase(st.session_state.answers)
+        save_to_firebase(st.session_state.answers, st.session_state.submission_id)
         st.session_state.answers = {}
+        st.session_state.submission_id = str(uuid.uuid4())  # The next response gets its own ID
         st.session_state.page = "Page 1"  # Reset to first page after submission
         st.rerun()
     
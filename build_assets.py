@@ -0,0 +1,94 @@
+import hashlib
+import io
+import json
+import os
+import sys
+
+from PIL import Image
+
+# Build step: python build_assets.py [assets_manifest.json]
+# Reads the source manifest and writes resized, recompressed variants with
+# content-hashed names plus the asset-manifest.json the survey reads at runtime.
+
+SOURCE_MANIFEST = "assets_manifest.json"
+BUILT_MANIFEST_NAME = "asset-manifest.json"
+
+PIL_FORMATS = {"webp": "WEBP", "jpeg": "JPEG"}
+
+# Function to encode one resized variant and return its bytes
+def encode_variant(image, width, fmt, quality):
+    height = round(image.height * width / image.width)
+    resized = image.resize((width, height), Image.LANCZOS) if width != image.width else image
+    buffer = io.BytesIO()
+    if fmt == "jpeg":
+        resized.save(buffer, PIL_FORMATS[fmt], quality=quality, optimize=True, progressive=True)
+    else:
+        resized.save(buffer, PIL_FORMATS[fmt], quality=quality, method=6)
+    return buffer.getvalue(), height
+
+# Function to build all variants for one source image
+def build_image(source, widths, formats, quality, output_dir):
+    stem = os.path.splitext(os.path.basename(source))[0]
+    with Image.open(source) as image:
+        image = image.convert("RGB")
+        # Never upscale: widths above the original are skipped
+        target_widths = sorted(w for w in widths if w <= image.width) or [image.width]
+        variants = []
+        for fmt in formats:
+            for width in target_widths:
+                data, height = encode_variant(image, width, fmt, quality)
+                digest = hashlib.sha256(data).hexdigest()[:10]
+                file_name = f"{stem}-{width}w.{digest}.{fmt}"
+                with open(os.path.join(output_dir, file_name), "wb") as f:
+                    f.write(data)
+                variants.append({
+                    "file": file_name,
+                    "hash": digest,
+                    "format": fmt,
+                    "width": width,
+                    "height": height,
+                    "bytes": len(data),
+                })
+    return variants
+
+def main(manifest_path=SOURCE_MANIFEST):
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+
+    output_dir = manifest.get("output_dir", "static")
+    os.makedirs(output_dir, exist_ok=True)
+
+    # Remove variants from previous builds so stale hashes don't pile up
+    built_path = os.path.join(output_dir, BUILT_MANIFEST_NAME)
+    if os.path.exists(built_path):
+        with open(built_path) as f:
+            previous = json.load(f)
+        for entry in previous.get("images", {}).values():
+            for variant in entry["variants"]:
+                old_file = os.path.join(output_dir, variant["file"])
+                if os.path.exists(old_file):
+                    os.remove(old_file)
+
+    built = {"images": {}}
+    for image in manifest["images"]:
+        source = image["source"]
+        variants = build_image(
+            source,
+            image.get("widths", manifest["widths"]),
+            image.get("formats", manifest["formats"]),
+            image.get("quality", manifest.get("quality", 75)),
+            output_dir,
+        )
+        built["images"][source] = {
+            "source_bytes": os.path.getsize(source),
+            "variants": variants,
+        }
+        smallest = min(v["bytes"] for v in variants)
+        print(f"{source}: {os.path.getsize(source)} bytes -> {len(variants)} variants (smallest {smallest} bytes)")
+
+    with open(built_path, "w") as f:
+        json.dump(built, f, indent=4)
+    print(f"Wrote {built_path}")
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
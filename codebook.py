@@ -0,0 +1,66 @@
+import json
+import sys
+
+from survey_spec import ARMS, PAGES
+
+# Versioned codebook of stable question IDs (first_name ... Q14) to question text per arm.
+# Responses store {id: value} plus the schema_version of the codebook used, instead of
+# answers keyed by question text; decode_response() turns them back into text for exports.
+# A version is frozen once written to codebook.json. After changing question text in
+# survey_spec.py, run
+#
+#   python codebook.py
+#
+# to add the next version; documents keep decoding with the version they were written with.
+# Schema version 1 is the older text-keyed layout, so codebook versions start at 2.
+CODEBOOK_PATH = "codebook.json"
+
+# Function to get the current {arm: {id: text}} from the questionnaire spec
+def codebook_from_spec():
+    return {
+        arm: {question.id: question.text for page in PAGES[arm].values() for question in page}
+        for arm in ARMS
+    }
+
+def load_codebooks(path=CODEBOOK_PATH):
+    with open(path, encoding="utf-8") as f:
+        return {int(version): codebook for version, codebook in json.load(f)["versions"].items()}
+
+CODEBOOKS = load_codebooks()
+CODEBOOK_VERSION = max(CODEBOOKS)
+
+# Reverse maps {text: id} per arm, used when answers are encoded
+_text_to_id = {arm: {text: qid for qid, text in CODEBOOKS[CODEBOOK_VERSION][arm].items()} for arm in ARMS}
+
+if codebook_from_spec() != CODEBOOKS[CODEBOOK_VERSION]:
+    print(f"survey_spec.py no longer matches codebook version {CODEBOOK_VERSION}; run python codebook.py")
+
+# Function to key answers by question ID; keys that are not in the codebook are kept as they are
+def encode_answers(arm, answers):
+    ids = _text_to_id[arm]
+    return {ids.get(key, key): value for key, value in answers.items()}
+
+# Function to turn an ID-keyed response back into question text for its arm and version.
+# Text-keyed (schema version 1) documents are returned unchanged.
+def decode_response(document):
+    codebook = CODEBOOKS.get(document.get("schema_version"), {}).get(document.get("arm"))
+    if not codebook:
+        return dict(document)
+    return {codebook.get(key, key): value for key, value in document.items()}
+
+# Writes a new codebook version if survey_spec.py has changed since the latest one
+def main(path=CODEBOOK_PATH):
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    versions = {int(version) for version in data["versions"]}
+    latest = max(versions)
+    if codebook_from_spec() == data["versions"][str(latest)]:
+        print(f"Codebook version {latest} matches survey_spec.py")
+        return
+    data["versions"][str(latest + 1)] = codebook_from_spec()
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+    print(f"Wrote codebook version {latest + 1}")
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -1,22 +1,166 @@
 import streamlit as st
 import pandas as pd
 import streamlit.components.v1 as components
-from firebase_config import initialize_firebase
+import pyarrow as pa
+from codebook import decode_response
+from exports import EXPORT_FORMATS, cached_batches, export_collection
+from live_table import get_live_table
+from responses import RESPONSES_COLLECTION
+from response_cache import drop_cache, sync_collection
+from storage import get_storage
+import math
+import os
 import time
 
-# Initialize Firebase
-firestore_client = initialize_firebase()
+# Loaded data is shared by every dashboard session and reused for CACHE_TTL seconds, so
+# switching collections, toggling options or downloading costs no reads. "Refresh data"
+# drops the cache early. Set the TTL with SURVEY_DASHBOARD_TTL.
+CACHE_TTL = int(os.environ.get("SURVEY_DASHBOARD_TTL", "300"))
+# In live mode each session checks the shared live table (live_table.py) this often, in
+# seconds, and re-renders only when it has changed. Set it with SURVEY_DASHBOARD_LIVE_INTERVAL.
+LIVE_REFRESH_INTERVAL = float(os.environ.get("SURVEY_DASHBOARD_LIVE_INTERVAL", "2"))
 
-def fetch_data(collection_name):
+# "Pages" reads one page of documents at a time with a cursor query, so a large collection
+# opens as fast as a small one; "Whole collection" loads everything (needed for exports).
+PAGED_VIEW = "📄 Pages"
+FULL_VIEW = "📚 Whole collection"
+LIVE_VIEW = "🟢 Live"
+PAGE_SIZES = (25, 50, 100, 250, 500)
+# Always read with a column selection so question text can still be looked up
+DECODE_FIELDS = ("arm", "schema_version")
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def list_collections():
+    return get_storage().list_collections(), time.time()
+
+# One sync of a collection's local Parquet copy (response_cache.py) per TTL, shared by every
+# session; each is incremental, so it only reads documents written since the last one.
+# Returns the time the data was read.
+@st.cache_resource(ttl=CACHE_TTL, show_spinner=False)
+def sync_documents(collection_name):
+    sync_collection(collection_name)
+    return time.time()
+
+# Function to load a collection as a DataFrame, indexed by document ID, plus the time its
+# data was read. It is built from the local copy batch by batch through Arrow, with the
+# same columns as an export; decode=True names the question columns by their text.
+@st.cache_data(ttl=CACHE_TTL, show_spinner="Loading data...")
+def fetch_data(collection_name, decode=False):
+    fetched_at = sync_documents(collection_name)
+    schema, batches = cached_batches(collection_name, decode)
+    return pa.Table.from_batches(batches, schema).to_pandas().set_index("document_id"), fetched_at
+
+# Function to read one page of a collection after the document ID `start_after`; reads
+# one extra document to know whether there is a next page
+@st.cache_data(ttl=CACHE_TTL, show_spinner="Loading page...")
+def fetch_page(collection_name, page_size, start_after=None, fields=None):
+    documents = get_storage().page_documents(collection_name, page_size + 1, start_after, fields)
+    return documents[:page_size], len(documents) > page_size
+
+# Server-side count for the page total; no documents are downloaded
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def count_documents(collection_name):
+    return get_storage().count(collection_name)
+
+# Function to get the column choices for a collection: the fields of its first page
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def page_fields(collection_name):
+    documents, _ = fetch_page(collection_name, PAGE_SIZES[0])
+    return list(dict.fromkeys(field for stored in documents for field in stored.data))
+
+# Function to build the DataFrame of one page, indexed by document ID, with only `columns`
+# (all fields when empty)
+def page_frame(documents, columns, decode=False):
+    rows = []
+    for stored in documents:
+        row = {column: stored.data[column] for column in columns if column in stored.data} if columns else dict(stored.data)
+        if decode:
+            lookup = {field: stored.data.get(field) for field in DECODE_FIELDS if field not in row}
+            row = decode_response({**row, **lookup})
+            for field in lookup:
+                row.pop(field)
+        rows.append(row)
+    return pd.DataFrame(rows, index=pd.Index([stored.id for stored in documents], name="document_id"))
+
+# Function to move the paged view to `page`, remembering the cursor it starts after
+def turn_page(key, page, cursor=None):
+    cursors = st.session_state.page_cursors[key]
+    if page == len(cursors):
+        cursors.append(cursor)
+    st.session_state.page_numbers[key] = page
+
+# Function to show a collection one page at a time. Each page is read from the cursor
+# (last document ID) of the page before it; cursors are kept per collection and page size,
+# so going back to an earlier page needs no re-scan.
+def show_pages(collection_name, decode):
+    size_column, columns_column = st.columns([1, 3])
+    page_size = size_column.selectbox("Rows per page", PAGE_SIZES, index=1)
+    columns = columns_column.multiselect("Columns", page_fields(collection_name), placeholder="All columns")
+    key = (collection_name, page_size)
+    cursors = st.session_state.setdefault("page_cursors", {}).setdefault(key, [None])
+    page = st.session_state.setdefault("page_numbers", {}).setdefault(key, 0)
+
+    fields = None
+    if columns:
+        fields = tuple(dict.fromkeys([*columns, *DECODE_FIELDS])) if decode else tuple(columns)
     try:
-        docs = firestore_client.collection(collection_name).stream()
-        data = [doc.to_dict() for doc in docs]
-        return pd.DataFrame(data) if data else pd.DataFrame()
+        documents, has_next = fetch_page(collection_name, page_size, cursors[page], fields)
+        total = count_documents(collection_name)
     except Exception as e:
         st.error(f"Error fetching data: {e}")
-        return pd.DataFrame()
+        return
+
+    if not documents:
+        st.warning("⚠ No data available in this collection.")
+        return
+
+    st.markdown("**📊 Data Preview:**")
+    st.dataframe(page_frame(documents, columns, decode), use_container_width=True)
+    previous_column, position_column, next_column = st.columns([1, 2, 1])
+    previous_column.button("⬅️ Previous", on_click=turn_page, args=(key, page - 1), disabled=page == 0)
+    position_column.caption(f"Page {page + 1} of {max(1, math.ceil(total / page_size))} · {total} documents")
+    next_column.button("Next ➡️", on_click=turn_page, args=(key, page + 1, documents[-1].id), disabled=not has_next)
+    st.caption("Switch to the whole collection to export it")
+
+# Function to build the DataFrame for one version of a live table; sessions showing the
+# same version share it
+@st.cache_data(max_entries=16, show_spinner=False)
+def live_frame(collection_name, version, decode, _documents):
+    data = [decode_response(document) for document in _documents] if decode else _documents
+    return pd.DataFrame(data) if data else pd.DataFrame()
+
+# Reruns the whole page once the live table has moved past the version on screen; in
+# between, only this caption is redrawn and nothing is read from the backend
+@st.fragment(run_every=LIVE_REFRESH_INTERVAL)
+def follow_live_table(table, shown_version):
+    if table.version != shown_version:
+        st.rerun()
+    if table.updated_at is None:
+        st.caption("🟡 Live: waiting for the first snapshot...")
+    else:
+        st.caption(f"🟢 Live: {len(table)} documents, last change {format_duration(time.time() - table.updated_at)} ago")
+
+# Function to drop every cached collection list and collection
+def clear_cache():
+    list_collections.clear()
+    sync_documents.clear()
+    fetch_data.clear()
+    fetch_page.clear()
+    count_documents.clear()
+    page_fields.clear()
+
+# Function to throw away the local copy of a collection and read it again in full
+def full_resync(collection_name):
+    drop_cache(collection_name)
+    clear_cache()
+
+# Function to format a duration for the data-age caption
+def format_duration(seconds):
+    seconds = int(seconds)
+    return f"{seconds}s" if seconds < 60 else f"{seconds // 60} min"
 
 def main():
+    get_storage().warm_up()  # Keep the Firestore token fresh between dashboard reruns
     # Custom styles
     st.markdown(
         """
@@ -50,9 +194,17 @@ def main():
     
     st.title("✨ Firestore Data Viewer ✨")
     
+    st.button("🔄 Refresh data", on_click=clear_cache)
+    
     # Get all collection names
-    collections = firestore_client.collections()
-    collection_names = [col.id for col in collections]
+    try:
+        collection_names, _ = list_collections()
+    except Exception as e:
+        st.error(f"Error fetching collections: {e}")
+        return
+    collection_names = list(collection_names)
+    # The canonical responses collection first; legacy survey_* collections after it
+    collection_names.sort(key=lambda name: name != RESPONSES_COLLECTION)
     
     if not collection_names:
         st.warning("No collections found in Firestore.")
@@ -60,9 +212,41 @@ def main():
     
     # Collection selection dropdown with animation
     selected_collection = st.selectbox("📂 Select a collection", collection_names)
+    st.button(
+        "♻️ Full resync",
+        on_click=full_resync,
+        args=(selected_collection,),
+        help="Re-read the whole collection, e.g. after responses were deleted"
+    )
+    
+    # Responses are stored keyed by question ID; optionally show and export the full text
+    decode = st.checkbox("Show question text instead of IDs")
+    view = st.radio(
+        "View",
+        (PAGED_VIEW, FULL_VIEW, LIVE_VIEW),
+        horizontal=True,
+        help="Live follows the collection as responses arrive instead of reloading it"
+    )
+    if view == PAGED_VIEW:
+        show_pages(selected_collection, decode)
+        return
+    live = view == LIVE_VIEW
     
     # Fetch data from selected collection
-    df = fetch_data(selected_collection)
+    try:
+        if live:
+            table = get_live_table(selected_collection)
+            version, documents = table.snapshot()
+            df = live_frame(selected_collection, version, decode, documents)
+        else:
+            df, fetched_at = fetch_data(selected_collection, decode)
+    except Exception as e:
+        st.error(f"Error fetching data: {e}")
+        return
+    if live:
+        follow_live_table(table, version)
+    else:
+        st.caption(f"🕒 Data loaded {format_duration(time.time() - fetched_at)} ago; cached for {format_duration(CACHE_TTL)} or until refreshed")
     
     if df.empty:
         st.warning("⚠ No data available in this collection.")
@@ -72,15 +256,34 @@ def main():
     st.markdown("**📊 Data Preview:**")
     st.dataframe(df, use_container_width=True)
     
+    if live:
+        st.caption("Switch to the whole collection to export it")
+        return
+    
+    # Exports are only built when asked for, from the local copy, and kept per data version
+    export_format = st.selectbox("📦 Export format", list(EXPORT_FORMATS))
+    if st.button("📦 Prepare export"):
+        try:
+            with st.spinner("Preparing export..."):
+                path = export_collection(selected_collection, export_format, decode)
+        except Exception as e:
+            st.error(f"Error preparing export: {e}")
+        else:
+            st.session_state.prepared_export = (selected_collection, export_format, decode, path)
+    
     # Download button with animation
-    if not df.empty:
-        csv = df.to_csv(index=False).encode('utf-8')
-        if st.download_button(
-            label="📥 Download CSV",
-            data=csv,
-            file_name=f"{selected_collection}.csv",
-            mime="text/csv"
-        ):
+    prepared = st.session_state.get("prepared_export")
+    if prepared and prepared[:3] == (selected_collection, export_format, decode) and os.path.exists(prepared[3]):
+        extension, mime = EXPORT_FORMATS[export_format]
+        with open(prepared[3], "rb") as f:
+            downloaded = st.download_button(
+                label=f"📥 Download {export_format}",
+                data=f,
+                file_name=f"{selected_collection}{extension}",
+                mime=mime
+            )
+        if downloaded:
+            del st.session_state.prepared_export
             st.success("✅ Download started!")
             time.sleep(1)
             st.toast("🎉 File downloaded successfully!")
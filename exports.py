@@ -0,0 +1,197 @@
+import json
+import os
+import re
+import tempfile
+from datetime import datetime, timezone
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pa_csv
+import pyarrow.parquet as pq
+
+from codebook import CODEBOOKS
+from response_cache import CACHE_DIR, CACHE_SCHEMA, cache_path, read_batches, read_watermark
+
+# Dashboard exports, built only when asked for. Rows are streamed from the dashboard's
+# local copy of a collection (response_cache.py), already in the canonical Arrow layout,
+# and written to disk one batch at a time, so no export is ever held in memory whole and
+# building one costs no backend reads. Files are kept per dataset version (document count and watermark of the
+# local copy), so asking again for an unchanged collection returns the file already built.
+# Columns are question IDs, or with decode=True the question text from the codebook; where
+# the arms (or codebook versions) word a question differently, each wording gets its own
+# column holding the answers given to it, as in the dashboard's decoded table.
+EXPORT_DIR = os.path.join(CACHE_DIR, "exports")
+
+# {format: (file extension, MIME type)}
+EXPORT_FORMATS = {
+    "CSV": (".csv", "text/csv"),
+    "Parquet": (".parquet", "application/vnd.apache.parquet"),
+    "Arrow IPC (Feather)": (".arrow", "application/vnd.apache.arrow.file"),
+    "JSONL": (".jsonl", "application/x-ndjson"),
+}
+
+# Function to get the version of the local copy of a collection, None if there is none
+def dataset_version(collection_name):
+    path = cache_path(collection_name)
+    if not os.path.exists(path):
+        return None
+    watermark = read_watermark(collection_name) or datetime.fromtimestamp(0, timezone.utc)
+    return f"{pq.read_metadata(path).num_rows}-{int(watermark.timestamp() * 1_000_000)}"
+
+def export_path(collection_name, version, export_format, decode=False):
+    extension, _ = EXPORT_FORMATS[export_format]
+    return os.path.join(EXPORT_DIR, f"{collection_name}-{version}{'-text' if decode else ''}{extension}")
+
+# File names written by export_path(); the version is always "<rows>-<watermark>", so a
+# collection name that itself contains dashes and digits is still split off correctly
+EXPORT_NAME = re.compile(r"(?P<collection>.+)-(?P<version>\d+-\d+)(?P<text>-text)?(?P<extension>\.[a-z]+)")
+
+# Function to split an export file name into (collection, version, decode, extension),
+# None if it is not one
+def parse_export_name(name):
+    match = EXPORT_NAME.fullmatch(name)
+    if match is None:
+        return None
+    return match["collection"], match["version"], bool(match["text"]), match["extension"]
+
+# Function to flatten struct columns into one typed column per field ("Q11.Reliability")
+def flatten_schema(schema):
+    fields = []
+    for field in schema:
+        if pa.types.is_struct(field.type):
+            fields.extend(pa.field(f"{field.name}.{child.name}", child.type) for child in field.type)
+        else:
+            fields.append(field)
+    return pa.schema(fields)
+
+def flatten_batch(batch, schema):
+    arrays = []
+    for column in batch.columns:
+        arrays.extend(column.flatten() if pa.types.is_struct(column.type) else [column])
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+# Function to plan the question-text columns of a flattened schema:
+# {column: [(text column, [(schema_version, arm), ...]), ...]}, one entry per wording
+def decode_plan(schema):
+    plan = {}
+    for field in schema:
+        question_id, _, part = field.name.partition(".")
+        wordings = {}
+        for version, codebook in sorted(CODEBOOKS.items()):
+            for arm, questions in codebook.items():
+                if question_id in questions:
+                    wordings.setdefault(questions[question_id], []).append((version, arm))
+        if wordings:
+            plan[field.name] = [(f"{text}.{part}" if part else text, pairs) for text, pairs in wordings.items()]
+    return plan
+
+def decoded_schema(schema, plan):
+    fields = []
+    for field in schema:
+        if field.name in plan:
+            fields.extend(pa.field(text, field.type) for text, _ in plan[field.name])
+        else:
+            fields.append(field)
+    return pa.schema(fields)
+
+# Function to split and rename the question columns of a flattened batch per decode_plan().
+# Rows go to the column of their arm's wording; rows whose arm and schema version match no
+# wording stay in the first one.
+def decode_batch(batch, plan, schema):
+    arms, versions = batch.column("arm"), batch.column("schema_version")
+    masks = {}
+    def rows_of(pairs):
+        if pairs not in masks:
+            mask = pa.array([False] * batch.num_rows)
+            for version, arm in pairs:
+                mask = pc.or_(mask, pc.fill_null(pc.and_(pc.equal(versions, version), pc.equal(arms, arm)), False))
+            masks[pairs] = mask
+        return masks[pairs]
+
+    arrays = []
+    for name, column in zip(batch.schema.names, batch.columns):
+        wordings = plan.get(name)
+        if not wordings or len(wordings) == 1:
+            arrays.append(column)
+            continue
+        null = pa.scalar(None, column.type)
+        others = [rows_of(tuple(pairs)) for _, pairs in wordings[1:]]
+        in_others = others[0]
+        for mask in others[1:]:
+            in_others = pc.or_(in_others, mask)
+        arrays.append(pc.if_else(in_others, null, column))
+        arrays.extend(pc.if_else(mask, column, null) for mask in others)
+    return pa.RecordBatch.from_arrays(arrays, schema=schema)
+
+# Function to get (schema, batches) of the local copy of a collection as exported: struct
+# columns flattened and, with decode=True, question columns named by their text
+def cached_batches(collection_name, decode=False):
+    flat_schema = schema = flatten_schema(CACHE_SCHEMA)
+    batches = (flatten_batch(batch, flat_schema) for batch in read_batches(collection_name))
+    if decode:
+        plan = decode_plan(flat_schema)
+        schema = decoded_schema(flat_schema, plan)
+        batches = (decode_batch(batch, plan, schema) for batch in batches)
+    return schema, batches
+
+def _json_default(value):
+    return value.isoformat() if isinstance(value, datetime) else str(value)
+
+# Function to write flattened batches to `path` in one of EXPORT_FORMATS, batch by batch
+def write_export(batches, schema, export_format, path):
+    if export_format == "CSV":
+        with pa_csv.CSVWriter(path, schema) as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+    elif export_format == "Parquet":
+        with pq.ParquetWriter(path, schema) as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+    elif export_format == "Arrow IPC (Feather)":
+        with pa.ipc.new_file(path, schema) as writer:
+            for batch in batches:
+                writer.write_batch(batch)
+    elif export_format == "JSONL":
+        with open(path, "w", encoding="utf-8") as f:
+            for batch in batches:
+                for row in batch.to_pylist():
+                    f.write(json.dumps(row, default=_json_default, ensure_ascii=False) + "\n")
+    else:
+        raise ValueError(f"Unknown export format {export_format!r}, expected one of {', '.join(EXPORT_FORMATS)}")
+
+# Function to get the path of an export of the local copy of a collection, building it if
+# this version has not been exported in this format yet. Older versions are deleted.
+# decode=True names columns by question text instead of ID.
+def export_collection(collection_name, export_format, decode=False):
+    version = dataset_version(collection_name)
+    if version is None:
+        raise FileNotFoundError(f"No local copy of {collection_name}; load it in the dashboard first")
+    path = export_path(collection_name, version, export_format, decode)
+    if os.path.exists(path):
+        return path
+
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    extension, _ = EXPORT_FORMATS[export_format]
+    for name in os.listdir(EXPORT_DIR):
+        parsed = parse_export_name(name)
+        if parsed is None:
+            continue
+        exported_collection, exported_version, _, exported_extension = parsed
+        if exported_collection == collection_name and exported_extension == extension and exported_version != version:
+            try:
+                os.remove(os.path.join(EXPORT_DIR, name))
+            except FileNotFoundError:
+                pass  # Removed by another session at the same time
+
+    schema, batches = cached_batches(collection_name, decode)
+    # A temporary file of its own, so sessions preparing the same export at once never
+    # write into one file; whichever finishes last replaces the other's identical result
+    descriptor, temporary_path = tempfile.mkstemp(dir=EXPORT_DIR, prefix=f".{collection_name}-", suffix=".tmp")
+    os.close(descriptor)
+    try:
+        write_export(batches, schema, export_format, temporary_path)
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+    return path
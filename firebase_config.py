@@ -1,9 +1,27 @@
-import firebase_admin
-from firebase_admin import credentials, firestore
+import threading
+import time
+from datetime import datetime, timedelta
+
 import streamlit as st
 
+# Process-wide Firestore client. It is created once, warmed in the background when the
+# first session starts, and its OAuth token is refreshed by a daemon thread before it
+# expires, so a respondent's Submit never pays for channel setup or a token fetch.
+TOKEN_CHECK_INTERVAL = 60          # seconds between token expiry checks
+TOKEN_REFRESH_MARGIN = 600         # refresh when the token expires within this many seconds
+WARMUP_RETRY_SECONDS = 5           # first retry delay after a failed warm-up, doubled up to
+WARMUP_RETRY_MAX_SECONDS = 300     # this many seconds
+
+_client = None
+_client_lock = threading.Lock()
+_background_started = False
+
 # Initialize Firebase using Streamlit secrets
 def initialize_firebase():
+    # Imported here so that importing this module does not pull in the Firebase SDK
+    import firebase_admin
+    from firebase_admin import credentials, firestore
+
     if not firebase_admin._apps:
         firebase_credentials = {
             "type": st.secrets["firebase_credentials"]["type"],
@@ -21,3 +39,54 @@ def initialize_firebase():
         firebase_admin.initialize_app(cred)
 
     return firestore.client()
+
+# Function to get the process-wide Firestore client, creating it on first use
+def get_db():
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = initialize_firebase()
+    return _client
+
+# Function to refresh the access token used by the client if it is missing or close to expiry
+def refresh_token():
+    import firebase_admin
+    from google.auth.transport.requests import Request
+
+    credential = firebase_admin.get_app().credential.get_credential()
+    expiry = credential.expiry
+    if not credential.valid or expiry is None or expiry - datetime.utcnow() < timedelta(seconds=TOKEN_REFRESH_MARGIN):
+        credential.refresh(Request())
+
+# Background thread: create the client, fetch a token, open the gRPC channel with one
+# cheap read, then keep the token fresh for the life of the process. A failed warm-up
+# (no network, bad credentials) is retried with backoff instead of ending the thread.
+def _keep_client_warm():
+    delay = WARMUP_RETRY_SECONDS
+    while True:
+        try:
+            db = get_db()
+            refresh_token()
+            db.collection("_warmup").document("ping").get()
+            break
+        except Exception as e:
+            print(f"Firestore warm-up failed, retrying in {delay}s: {e}")
+            time.sleep(delay)
+            delay = min(delay * 2, WARMUP_RETRY_MAX_SECONDS)
+
+    while True:
+        time.sleep(TOKEN_CHECK_INTERVAL)
+        try:
+            refresh_token()
+        except Exception as e:
+            print(f"Firestore token refresh failed: {e}")
+
+# Function to warm the client in the background; only the first call starts the thread
+def warm_up_client():
+    global _background_started
+    with _client_lock:
+        if _background_started:
+            return
+        _background_started = True
+    threading.Thread(target=_keep_client_warm, name="firestore-warmup", daemon=True).start()
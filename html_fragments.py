@@ -0,0 +1,96 @@
+# Pre-rendered HTML fragments for the survey. None of this content depends on session
+# state, so each fragment is built once per process and reused on every rerun.
+
+SCENARIO_HTML = """
+<div style="padding: 10px; background-color: rgba(255, 255, 255); border-radius: 10px; margin-bottom: 10px;">
+    <h3 style="color: black;">Scenario Description</h3>
+    <p style="color: black;">
+        <strong> Case Study Background:</strong><br>
+        AeroConnect Airlines has been rapidly expanding its fleet and network over the past three years. As part of its operational optimization initiative, the airline is reviewing its procurement strategy for critical aircraft components. Your team has been tasked with selecting a new supplier for <strong>Avionics Control Units</strong>, which are essential components that manage flight-critical electronic systems throughout the aircraft. This survey aims to evaluate your selection criteria for 3 suppliers for the CDU Component.
+    </p>
+    <p style="color: black;">
+        <strong>Component Overview: Control Display Unit (CDU)</strong><br>
+        CDUs are essential components in modern aircrafts, enabling pilots to manage and monitor various flight systems. The <strong>Control Display Unit (CDU)</strong> serves as the primary interface for pilots to interact with the aircraft's avionics systems. The CDU allows for flight management, system monitoring, and operational control, making it indispensable for safe and efficient flight operations.
+    </p>
+    <p style="color: black;">
+        <strong>Key Applications of the CDU:</strong><br>
+        - <strong>Flight Management:</strong> Input navigation waypoints, flight plans, and performance data.<br>
+        - <strong>Communication:</strong>Communicate information to other avionics systems like the Flight Management System (FMS), Autopilot, and Navigation Display.<br>
+        - <strong>Fuel Management:</strong> Manage the aircraft fuel system and optimize fuel efficiency to ensure sufficient reserves for the duration of the flight.<br>
+        - <strong>System Diagnostics:</strong> Monitor performance parameters and diagnose abnormalities.
+    </p>
+    <p style="color: black;">
+        <strong>Problem Statement:</strong><br>
+        The current supplier's contract is expiring in <strong>60 days</strong>, and the procurement department must finalize a new supplier relationship. AeroConnect operates <strong>45 commercial aircraft</strong> with plans to add <strong>8 more within the next 18 months</strong>. Each aircraft requires regular replacement of these units as part of scheduled maintenance procedures.
+    </p>
+    <p style="color: black;">
+        The Avionics Control Units are critical safety components - any malfunction could potentially lead to flight delays, cancellations, or in extreme cases, safety incidents requiring investigation. The airline's maintenance schedule indicates it will need approximately <strong>120 units annually</strong>.
+    </p>
+    <p style="color: black;">
+        <strong>Your Task:</strong><br>
+        As the procurement specialist, you must evaluate <strong>3</strong> potential suppliers and make a recommendation. Your decision will impact not only cost structures but also maintenance schedules, parts availability, and potentially operational reliability.
+    </p>
+</div>
+"""
+
+# Extra framing shown only to the bias arm, right under the scenario
+INDUSTRY_DATA_HTML = """
+<div style="padding: 10px; background-color: rgba(255, 0, 0); border-radius: 10px; margin-bottom: 10px;">
+    <p style="color: white;">
+        <strong>Industry Data:</strong><br>
+        In the past year, airlines with supplier reliability issues reported operational disruptions averaging <strong>3-5 days per incident</strong>. These disruptions resulted in maintenance costs, schedule adjustments, and customer compensation averaging <strong>$450,000 per incident</strong>. Quality control variations among suppliers were identified as the primary contributing factor.
+    </p>
+</div>
+"""
+
+EVALUATION_CRITERIA_HTML = """
+<div style="padding: 10px; background-color: rgba(255, 255, 255); border-radius: 10px; margin-bottom: 10px;">
+    <h3 style="color: black;">Evaluation Criteria</h3>
+    <p style="color: black;">
+        You are expected to evaluate the suppliers through various criteria: <strong>Lead Time, Lead Variability, Reliability, Price, Minimum Order Quantity, Certification Standards, and Warranty Period</strong>.
+    </p>
+</div>
+"""
+
+SUPPLIER_TABLE_CSS = """
+table {
+    width: 100%;
+    border-collapse: collapse;
+    background-color: rgba(255, 255, 255);
+}
+th, td {
+    padding: 8px;
+    text-align: left;
+    border-bottom: 1px solid #ddd;
+    color: black;
+}
+th {
+    background-color: rgba(255, 255, 255);
+    color: black;
+}
+"""
+
+# Function to render the supplier comparison table (one row per supplier, one column per
+# feature) in the same shape pandas' to_html() produced, without pandas
+def render_supplier_table(suppliers, index_label="Feature"):
+    columns = list(suppliers)
+    rows = list(dict.fromkeys(supplier for values in suppliers.values() for supplier in values))
+    header = "".join(f"<th>{label}</th>" for label in [index_label] + columns)
+    body = "".join(
+        "<tr>" + "".join(f"<td>{cell}</td>" for cell in [row] + [suppliers[column].get(row, "") for column in columns]) + "</tr>"
+        for row in rows
+    )
+    return (
+        '<table border="1" class="dataframe">'
+        f'<thead><tr style="text-align: right;">{header}</tr></thead>'
+        f"<tbody>{body}</tbody>"
+        "</table>"
+    )
+
+# Function to wrap the supplier table in the white card used across the survey
+def render_supplier_details(suppliers):
+    return (
+        '<div style="padding: 10px; background-color: rgba(255, 255, 255); border-radius: 10px; margin-bottom: 10px;">'
+        f"{render_supplier_table(suppliers)}"
+        "</div>"
+    )
@@ -0,0 +1,56 @@
+import threading
+import time
+
+from storage import get_storage
+
+# Live view of a collection for the dashboard. One watch per collection per process
+# (storage.watch(): a Firestore snapshot listener, or polling on the other backends) keeps
+# an in-memory {document_id: document} table up to date by applying added, modified and
+# removed changes. Every dashboard session reads that table, so any number of researchers
+# watching a running study cost one listener, not one full scan per reload.
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+class LiveTable:
+    def __init__(self, collection_name, storage=None):
+        self.collection_name = collection_name
+        self._documents = {}
+        self._lock = threading.Lock()
+        # Bumped on every applied change; sessions compare it to know when to re-render
+        self.version = 0
+        # Time the table last changed (or of the first snapshot), None until that arrives
+        self.updated_at = None
+        self._watch = (storage or get_storage()).watch(collection_name, self._apply)
+
+    # Function to apply [(change, StoredDocument), ...] from the watch
+    def _apply(self, changes):
+        with self._lock:
+            for change, stored in changes:
+                if change == "removed":
+                    self._documents.pop(stored.id, None)
+                else:
+                    self._documents[stored.id] = stored.data
+            # Polls and snapshots that bring no changes leave the version and time alone
+            if changes or self.updated_at is None:
+                self.version += 1
+                self.updated_at = time.time()
+
+    # Function to get (version, documents) as of one consistent point
+    def snapshot(self):
+        with self._lock:
+            return self.version, list(self._documents.values())
+
+    def __len__(self):
+        with self._lock:
+            return len(self._documents)
+
+    def close(self):
+        self._watch.unsubscribe()
+
+# Function to get the process-wide live table of a collection, starting its watch on first use
+def get_live_table(collection_name):
+    with _tables_lock:
+        if collection_name not in _tables:
+            _tables[collection_name] = LiveTable(collection_name)
+        return _tables[collection_name]
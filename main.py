@@ -1,22 +1,23 @@
 import streamlit as st
 import random
+import importlib
 
-# Import the main functions from the two apps
-from control_group_app import main as control_group_main
-from bias_test import main as bias_test_main
+# Module of each study arm. Only the arm assigned to the session is imported, on its
+# first run; later runs (and sessions on the same arm) reuse it from sys.modules.
+ARM_MODULES = {
+    "control": "control_group_app",
+    "bias": "bias_test",
+}
 
 def main():
     st.set_page_config(page_title="Main App", page_icon="📊")
 
     # Store selected app in session state
     if "selected_app" not in st.session_state:
-        st.session_state.selected_app = random.choice(["control", "bias"])
+        st.session_state.selected_app = random.choice(list(ARM_MODULES))
 
-    # Run the selected app
-    if st.session_state.selected_app == "control":
-        control_group_main()
-    else:
-        bias_test_main()
+    # Import and run the selected app
+    importlib.import_module(ARM_MODULES[st.session_state.selected_app]).main()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,90 @@
+import json
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from responses import RESPONSES_COLLECTION, from_legacy, is_legacy_collection
+from storage import FIRESTORE_BATCH_LIMIT, TIMESTAMP_FIELD, get_storage
+
+# Migration: copy every legacy "survey_*" collection into the canonical responses
+# collection (see responses.py), in batches, several collections at a time.
+#
+#   python migrate_responses.py [workers]
+#
+# Each legacy document becomes responses/<collection>-<id>, so re-running never creates
+# duplicates. Progress is checkpointed to MIGRATION_STATE_PATH after every batch; an
+# interrupted run picks up after the last committed batch. Legacy collections are left in
+# place; delete them once the dashboard has been checked against the migrated data.
+MIGRATION_STATE_PATH = os.environ.get("SURVEY_MIGRATION_STATE_PATH", "migration_state.json")
+DEFAULT_WORKERS = 8
+
+_state_lock = threading.Lock()
+
+def load_state():
+    try:
+        with open(MIGRATION_STATE_PATH) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+# Function to record progress for one collection; the file is replaced atomically
+def save_progress(state, collection_name, progress):
+    with _state_lock:
+        state[collection_name] = progress
+        temporary_path = f"{MIGRATION_STATE_PATH}.tmp"
+        with open(temporary_path, "w") as f:
+            json.dump(state, f, indent=4)
+        os.replace(temporary_path, MIGRATION_STATE_PATH)
+
+# Function to migrate one legacy collection; returns the number of documents written.
+# Documents are copied in ID order so the checkpoint can be the last ID written.
+def migrate_collection(storage, collection_name, state):
+    progress = dict(state.get(collection_name, {"last_id": None, "migrated": 0, "done": False}))
+    if progress["done"]:
+        return 0
+
+    documents = sorted(storage.scan_documents(collection_name), key=lambda stored: stored.id)
+    if progress["last_id"] is not None:
+        documents = [stored for stored in documents if stored.id > progress["last_id"]]
+
+    written = 0
+    for start in range(0, len(documents), FIRESTORE_BATCH_LIMIT):
+        chunk = documents[start:start + FIRESTORE_BATCH_LIMIT]
+        writes = []
+        for stored in chunk:
+            response = from_legacy(collection_name, stored.data)
+            # Legacy documents have no timestamp; keep when they were written, not migrated
+            response.setdefault(TIMESTAMP_FIELD, stored.updated_at)
+            writes.append((RESPONSES_COLLECTION, f"{collection_name}-{stored.id}", response))
+        storage.bulk_put(writes)
+        written += len(chunk)
+        progress = {"last_id": chunk[-1].id, "migrated": progress["migrated"] + len(chunk), "done": False}
+        save_progress(state, collection_name, progress)
+
+    save_progress(state, collection_name, {**progress, "done": True})
+    return written
+
+def main(workers=DEFAULT_WORKERS):
+    storage = get_storage()
+    state = load_state()
+    legacy = [name for name in storage.list_collections() if is_legacy_collection(name)]
+    pending = [name for name in legacy if not state.get(name, {}).get("done")]
+    print(f"{len(legacy)} legacy collections, {len(legacy) - len(pending)} already migrated")
+
+    failures = 0
+    with ThreadPoolExecutor(max_workers=int(workers)) as pool:
+        futures = {name: pool.submit(migrate_collection, storage, name, state) for name in pending}
+        for name, future in futures.items():
+            try:
+                print(f"{name}: {future.result()} documents migrated")
+            except Exception as e:
+                failures += 1
+                print(f"{name}: failed, will resume from the last checkpoint on the next run ({e})")
+
+    print(f"{RESPONSES_COLLECTION} now holds {storage.count(RESPONSES_COLLECTION)} documents")
+    if failures:
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,178 @@
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+# Durable local outbox for survey submissions. Every submission is committed to SQLite
+# (WAL mode) before anything talks to the storage backend; an entry stays pending until a write
+# succeeds and is retried with exponential backoff until then.
+#
+#   python outbox.py status    # counts and the pending entries
+#   python outbox.py flush     # push every pending entry to the storage backend now
+OUTBOX_PATH = os.environ.get("SURVEY_OUTBOX_PATH", "outbox.sqlite3")
+# A queued entry is claimed for this long; if the process dies first, it becomes due again
+CLAIM_SECONDS = 60
+RETRY_BASE_SECONDS = 5
+RETRY_MAX_SECONDS = 3600
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    collection TEXT NOT NULL,
+    document_id TEXT NOT NULL,
+    document TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL,
+    last_error TEXT,
+    delivered_at REAL
+);
+CREATE INDEX IF NOT EXISTS outbox_pending ON outbox (next_attempt_at) WHERE delivered_at IS NULL;
+CREATE UNIQUE INDEX IF NOT EXISTS outbox_document ON outbox (collection, document_id);
+"""
+
+# Function to get the retry delay after a given number of failed attempts
+def backoff_seconds(attempts):
+    return min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (attempts - 1))
+
+class Outbox:
+    def __init__(self, path=OUTBOX_PATH):
+        # One connection shared by the script and writer threads, serialized by a lock
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            # In WAL mode NORMAL survives process crashes; only an OS crash can lose the last commits
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(outbox)")]
+            if columns and "document_id" not in columns:
+                # Outboxes from before keyed writes: give every entry its own ID
+                self._conn.execute("ALTER TABLE outbox ADD COLUMN document_id TEXT")
+                self._conn.execute("UPDATE outbox SET document_id = lower(hex(randomblob(16)))")
+            self._conn.executescript(SCHEMA)
+
+    # Append a submission, claimed by the caller who is about to write it; returns its ID.
+    # Submitting the same document ID again replaces the entry and makes it pending again.
+    def append(self, collection_name, document_id, document):
+        now = time.time()
+        with self._lock:
+            (entry_id,) = self._conn.execute(
+                "INSERT INTO outbox (collection, document_id, document, created_at, next_attempt_at) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (collection, document_id) DO UPDATE SET "
+                "document = excluded.document, next_attempt_at = excluded.next_attempt_at, delivered_at = NULL "
+                "RETURNING id",
+                (collection_name, document_id, json.dumps(document), now, now + CLAIM_SECONDS),
+            ).fetchone()
+        return entry_id
+
+    # Give up a claim so the entry is due again right away
+    def release(self, entry_id):
+        with self._lock:
+            self._conn.execute("UPDATE outbox SET next_attempt_at = ? WHERE id = ?", (time.time(), entry_id))
+
+    # Mark entries as written; takes a list of IDs, as a batch commit delivers several at once
+    def mark_delivered(self, entry_ids):
+        now = time.time()
+        # The connection context commits, or rolls back if a statement fails, so an error
+        # never leaves the shared connection inside an open transaction
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany("UPDATE outbox SET delivered_at = ? WHERE id = ?", [(now, i) for i in entry_ids])
+
+    # Record a failed write of the given entries and schedule their next attempt
+    def mark_failed(self, entry_ids, error):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            for entry_id in entry_ids:
+                row = self._conn.execute("SELECT attempts + 1 FROM outbox WHERE id = ?", (entry_id,)).fetchone()
+                if row is None:
+                    continue
+                (attempts,) = row
+                self._conn.execute(
+                    "UPDATE outbox SET attempts = ?, last_error = ?, next_attempt_at = ? WHERE id = ?",
+                    (attempts, str(error), now + backoff_seconds(attempts), entry_id),
+                )
+
+    # Claim up to `limit` pending entries due by `due_before` (default: now; -1 means no limit).
+    # Returns [(id, collection, document_id, document), ...]
+    def claim_due(self, limit, due_before=None, claim_seconds=CLAIM_SECONDS):
+        now = time.time()
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, collection, document_id, document FROM outbox "
+                "WHERE delivered_at IS NULL AND next_attempt_at <= ? ORDER BY next_attempt_at LIMIT ?",
+                (now if due_before is None else due_before, limit),
+            ).fetchall()
+            self._conn.executemany(
+                "UPDATE outbox SET next_attempt_at = ? WHERE id = ?",
+                [(now + claim_seconds, row[0]) for row in rows],
+            )
+        return [(entry_id, collection_name, document_id, json.loads(document)) for entry_id, collection_name, document_id, document in rows]
+
+    # Function to get the pending entries (oldest first), regardless of their backoff
+    def pending(self):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, collection, created_at, attempts, next_attempt_at, last_error FROM outbox "
+                "WHERE delivered_at IS NULL ORDER BY id"
+            ).fetchall()
+
+    def counts(self):
+        with self._lock:
+            return dict(self._conn.execute(
+                "SELECT CASE WHEN delivered_at IS NULL THEN 'pending' ELSE 'delivered' END, COUNT(*) "
+                "FROM outbox GROUP BY 1"
+            ).fetchall())
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+# Function to push every pending entry now, ignoring backoff and claims, in batches of
+# `batch_size`; write_batch takes [(collection, document_id, document), ...].
+# Writes are keyed upserts, so an entry that was in fact already written is just rewritten.
+# Returns (delivered, failed)
+def flush(outbox, write_batch, batch_size=500):
+    delivered = failed = 0
+    entries = outbox.claim_due(limit=-1, due_before=float("inf"))
+    for start in range(0, len(entries), batch_size):
+        batch = entries[start:start + batch_size]
+        entry_ids = [entry[0] for entry in batch]
+        try:
+            write_batch([entry[1:] for entry in batch])
+            outbox.mark_delivered(entry_ids)
+            delivered += len(batch)
+        except Exception as e:
+            print(f"Entries #{entry_ids[0]}-#{entry_ids[-1]}: {e}")
+            outbox.mark_failed(entry_ids, e)
+            failed += len(batch)
+    return delivered, failed
+
+def print_status(outbox):
+    counts = outbox.counts()
+    print(f"{OUTBOX_PATH}: {counts.get('pending', 0)} pending, {counts.get('delivered', 0)} delivered")
+    now = time.time()
+    for entry_id, collection_name, created_at, attempts, next_attempt_at, last_error in outbox.pending():
+        print(
+            f"  #{entry_id} {collection_name}: queued {now - created_at:.0f}s ago, {attempts} failed attempts, "
+            f"next attempt in {max(0, next_attempt_at - now):.0f}s" + (f", last error: {last_error}" if last_error else "")
+        )
+
+def main(command="status"):
+    outbox = Outbox()
+    if command == "status":
+        print_status(outbox)
+    elif command == "flush":
+        from submissions import BATCH_MAX_SIZE, write_batch_to_storage
+        delivered, failed = flush(outbox, write_batch_to_storage, BATCH_MAX_SIZE)
+        print(f"Delivered {delivered}, failed {failed}")
+    else:
+        sys.exit(f"Unknown command: {command} (expected status or flush)")
+    outbox.close()
+
+if __name__ == "__main__":
+    main(*sys.argv[1:])
@@ -0,0 +1,105 @@
+import itertools
+import os
+import tempfile
+from datetime import datetime
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
+
+from arrow_batches import BATCH_SIZE, RESPONSE_SCHEMA, stream_record_batches
+
+# Local Parquet copy of each collection the dashboard has read, with an update-time
+# watermark. A sync only asks the storage backend for documents written after the
+# watermark and merges them in by document ID, so the cost of a refresh follows the number
+# of new responses, not the size of the collection. A full resync re-reads everything (it
+# is also the only way deletions are picked up). Set the folder with
+# SURVEY_DASHBOARD_CACHE_DIR.
+CACHE_DIR = os.environ.get("SURVEY_DASHBOARD_CACHE_DIR", ".dashboard_cache")
+WATERMARK_KEY = b"watermark"
+# Row groups are read one at a time by streaming readers (exports.py, the dashboard)
+ROW_GROUP_SIZE = 10000
+
+# Documents are stored in the canonical response layout (arrow_batches.py), legacy
+# collections converted on the way in. The backend scan is written batch by batch, so no
+# sync holds more than one batch of the collection in Python.
+CACHE_SCHEMA = RESPONSE_SCHEMA
+
+def cache_path(collection_name):
+    return os.path.join(CACHE_DIR, f"{collection_name}.parquet")
+
+# Function to tell whether there is a local copy of a collection in the current layout; a
+# copy written with another schema (an older version of the dashboard or questionnaire)
+# is read again in full
+def has_cache(collection_name):
+    path = cache_path(collection_name)
+    return os.path.exists(path) and pq.read_schema(path).equals(CACHE_SCHEMA)
+
+# Function to read the watermark of the local copy, None if there is no copy (or it is empty)
+def read_watermark(collection_name):
+    path = cache_path(collection_name)
+    if not os.path.exists(path):
+        return None
+    watermark = (pq.read_metadata(path).metadata or {}).get(WATERMARK_KEY)
+    return datetime.fromisoformat(watermark.decode()) if watermark else None
+
+# Function to iterate over the local copy of a collection one RecordBatch at a time
+def read_batches(collection_name, batch_size=BATCH_SIZE):
+    return pq.ParquetFile(cache_path(collection_name)).iter_batches(batch_size=batch_size)
+
+# Function to write batches to the cache file (atomically) with their watermark, the
+# latest update time among them, or `watermark` if none is later
+def write_cache(collection_name, batches, watermark=None):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    # A temporary file of its own, so sessions syncing at once never write into one file
+    descriptor, temporary_path = tempfile.mkstemp(dir=CACHE_DIR, prefix=f".{collection_name}-", suffix=".tmp")
+    os.close(descriptor)
+    try:
+        with pq.ParquetWriter(temporary_path, CACHE_SCHEMA) as writer:
+            for batch in batches:
+                writer.write_batch(batch, row_group_size=ROW_GROUP_SIZE)
+                latest = pc.max(batch.column("updated_at")).as_py()
+                if latest is not None and (watermark is None or latest > watermark):
+                    watermark = latest
+            if watermark is not None:
+                writer.add_key_value_metadata({WATERMARK_KEY: watermark.isoformat().encode()})
+        os.replace(temporary_path, cache_path(collection_name))
+    except BaseException:
+        os.remove(temporary_path)
+        raise
+
+# Function to bring the local copy of a collection up to date and return how many
+# documents were read from the backend. full=True ignores the local copy.
+def sync_collection(collection_name, full=False):
+    if full or not has_cache(collection_name):
+        read = 0
+        def counted(batches):
+            nonlocal read
+            for batch in batches:
+                read += batch.num_rows
+                yield batch
+        # Every document is read once, straight from the backend scan into the file
+        write_cache(collection_name, counted(stream_record_batches(collection_name)))
+        return read
+
+    # After that only new writes are; they are few, so they are collected before merging.
+    # A batch commit gives all its documents the same update time, so everything up to
+    # and including the watermark has been seen.
+    watermark = read_watermark(collection_name)
+    fetched = list(stream_record_batches(collection_name, since=watermark))
+    read = sum(batch.num_rows for batch in fetched)
+    if not read:
+        return 0
+    changed = pa.concat_arrays([batch.column("document_id") for batch in fetched])
+    # Older versions of the changed documents are left out of the rewritten copy
+    kept = (batch.filter(pc.invert(pc.is_in(batch.column("document_id"), value_set=changed)))
+            for batch in read_batches(collection_name))
+    write_cache(collection_name, itertools.chain(kept, fetched), watermark)
+    return read
+
+# Function to delete the local copy of a collection so the next sync is a full one
+def drop_cache(collection_name):
+    try:
+        os.remove(cache_path(collection_name))
+    except FileNotFoundError:
+        pass
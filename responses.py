@@ -0,0 +1,55 @@
+from codebook import CODEBOOK_VERSION, encode_answers
+from survey_spec import ALLOCATION_SUPPLIERS
+
+# Canonical layout of stored survey responses. Every app writes to one "responses"
+# collection; each document carries its study arm, the schema version of its answer
+# layout, and a "submitted_at" server timestamp set by the storage backend (storage.py).
+# Older data lives in per-arm and per-respondent "survey_*" collections; migrate it with
+# migrate_responses.py.
+
+RESPONSES_COLLECTION = "responses"
+# Version 1: answers keyed by question text, as the apps collect them.
+# Version 2 and later: answers keyed by question ID, per the codebook of that version.
+SCHEMA_VERSION = CODEBOOK_VERSION
+
+LEGACY_COLLECTION_PREFIX = "survey_"
+# Legacy collections written by a single arm. survey_control documents have
+# is_control=False, so the collection name is the only reliable marker.
+LEGACY_COLLECTION_ARMS = {
+    "survey_bais": "bias",
+    "survey_control": "control",
+}
+
+# The allocation widget answers Q3 with one "<supplier>: in %" entry per supplier
+ALLOCATION_ANSWER_KEYS = {supplier: f"{supplier}: in %" for supplier in ALLOCATION_SUPPLIERS}
+
+# Function to collect the per-supplier allocation answers into one Q3 answer,
+# {supplier: percent}. Also used on documents written before Q3 was stored this way.
+def fold_allocation(answers):
+    if not any(key in answers for key in ALLOCATION_ANSWER_KEYS.values()):
+        return answers
+    answers = dict(answers)
+    allocation = dict(answers["Q3"]) if isinstance(answers.get("Q3"), dict) else {}
+    for supplier, key in ALLOCATION_ANSWER_KEYS.items():
+        if key in answers:
+            allocation[supplier] = answers.pop(key)
+    answers["Q3"] = allocation
+    return answers
+
+# Function to build the canonical document for one response, keyed by question ID
+def make_response(arm, answers):
+    return {**encode_answers(arm, fold_allocation(answers)), "arm": arm, "schema_version": SCHEMA_VERSION}
+
+# Function to tell whether a collection holds legacy responses
+def is_legacy_collection(collection_name):
+    return collection_name.startswith(LEGACY_COLLECTION_PREFIX)
+
+# Function to convert a legacy document into the canonical layout. The per-respondent
+# collections (GUI.py, bias_group_app.py) mark the arm with is_control (1/0 or a bool).
+def from_legacy(collection_name, document):
+    answers = dict(document)
+    is_control = answers.pop("is_control", None)
+    arm = LEGACY_COLLECTION_ARMS.get(collection_name) or ("control" if is_control else "bias")
+    response = make_response(arm, answers)
+    response["legacy_collection"] = collection_name
+    return response
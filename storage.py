@@ -0,0 +1,417 @@
+import json
+import os
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+
+from firebase_config import get_db, warm_up_client
+
+# Storage backends for survey responses. The survey apps, the submission writer and the
+# dashboard only use the Storage interface below, so the whole stack can run (and be load
+# tested) offline. Pick the backend with SURVEY_STORAGE_BACKEND:
+#   firestore (default)  Firestore via firebase_config
+#   sqlite               a local SQLite file at SURVEY_STORAGE_PATH
+#   memory               process-local dicts, lost on exit
+STORAGE_BACKEND = os.environ.get("SURVEY_STORAGE_BACKEND", "firestore")
+STORAGE_PATH = os.environ.get("SURVEY_STORAGE_PATH", "responses.sqlite3")
+# Firestore accepts at most 500 writes per batch commit
+FIRESTORE_BATCH_LIMIT = 500
+# Set by the backend to its own clock at write time unless the document already has it
+TIMESTAMP_FIELD = "submitted_at"
+# Set by the backend to its own clock on every write; incremental readers use it as a watermark
+UPDATED_FIELD = "updated_at"
+# Backends without change notifications are watched by polling for new writes this often (seconds)
+WATCH_POLL_INTERVAL = float(os.environ.get("SURVEY_WATCH_POLL_INTERVAL", "2"))
+
+_storage = None
+_storage_lock = threading.Lock()
+
+# A stored document with its ID and the time it was last written (a UTC datetime)
+StoredDocument = namedtuple("StoredDocument", ["id", "data", "updated_at"])
+
+# Function to copy a document stamped with the write time: always as its update time,
+# and as its submission time if it has none yet
+def _stamped(document, now):
+    return {TIMESTAMP_FIELD: now, **document, UPDATED_FIELD: now}
+
+# Function to get the update time of a write that follows one made at `last` (a UTC datetime
+# or None): the current time, or just after `last` if the clock has not moved past it.
+# Update times then grow with every commit, so a reader that has seen everything up to a
+# watermark never misses a write committed after it.
+def _next_write_time(last):
+    now = datetime.now(timezone.utc)
+    return now if last is None or now > last else last + timedelta(microseconds=1)
+
+# JSON encoding for the SQLite backend; datetimes are stored as ISO 8601 strings
+def _encode(document):
+    return json.dumps(document, default=lambda value: value.isoformat() if isinstance(value, datetime) else str(value))
+
+# A watch that polls scan_since() in a daemon thread. It reports every existing document
+# as "added" first, then new and rewritten documents; deletions are not seen.
+class _PollingWatch:
+    def __init__(self, storage, collection_name, callback, interval=WATCH_POLL_INTERVAL):
+        self._storage = storage
+        self._collection_name = collection_name
+        self._callback = callback
+        self._interval = interval
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f"watch-{collection_name}", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        seen, watermark = set(), None
+        while not self._stopped.is_set():
+            try:
+                initial = watermark is None
+                if initial:
+                    fetched = list(self._storage.scan_documents(self._collection_name))
+                else:
+                    fetched = list(self._storage.scan_since(self._collection_name, watermark))
+                changes = []
+                for stored in fetched:
+                    changes.append(("modified" if stored.id in seen else "added", stored))
+                    seen.add(stored.id)
+                    if watermark is None or stored.updated_at > watermark:
+                        watermark = stored.updated_at
+                if watermark is None:
+                    watermark = datetime.fromtimestamp(0, timezone.utc)
+                # The initial scan is always reported, even for an empty collection
+                if changes or initial:
+                    self._callback(changes)
+            except Exception as e:
+                print(f"Watch on {self._collection_name} failed, retrying: {e}")
+            self._stopped.wait(self._interval)
+
+    def unsubscribe(self):
+        self._stopped.set()
+
+# Function to copy a document keeping only `fields` (all of them when fields is None)
+def _select(document, fields):
+    if fields is None:
+        return dict(document)
+    return {field: document[field] for field in fields if field in document}
+
+def _decode(data):
+    document = json.loads(data)
+    for field in (TIMESTAMP_FIELD, UPDATED_FIELD):
+        if isinstance(document.get(field), str):
+            document[field] = datetime.fromisoformat(document[field])
+    return document
+
+# Interface every backend implements; a backend missing one of the abstract methods fails
+# when it is created, not on its first call
+class Storage(ABC):
+    # Function to write one response under a known ID (an upsert)
+    def put_response(self, collection_name, document_id, document):
+        self.bulk_put([(collection_name, document_id, document)])
+
+    # Function to write [(collection, document_id, document), ...]; keyed upserts, so
+    # writing the same response twice leaves a single document. Documents without a
+    # TIMESTAMP_FIELD get the backend's time of the write.
+    @abstractmethod
+    def bulk_put(self, writes):
+        raise NotImplementedError
+
+    # Function to iterate over every document in a collection as StoredDocument
+    @abstractmethod
+    def scan_documents(self, collection_name):
+        raise NotImplementedError
+
+    # Function to iterate over every document in a collection (as dicts)
+    def scan(self, collection_name):
+        return (stored.data for stored in self.scan_documents(collection_name))
+
+    # Function to iterate over the documents written after `updated_after` (a UTC datetime)
+    # as StoredDocument, oldest first. Documents written before update times
+    # were stamped are only returned by scan_documents().
+    @abstractmethod
+    def scan_since(self, collection_name, updated_after):
+        raise NotImplementedError
+
+    # Function to iterate over the documents of one study arm ("bias" or "control")
+    @abstractmethod
+    def query_by_arm(self, collection_name, arm):
+        raise NotImplementedError
+
+    # Function to get up to `limit` documents as StoredDocument in document ID order,
+    # starting after the document ID `start_after` (a cursor; None for the first page).
+    # With `fields`, documents only carry those fields.
+    @abstractmethod
+    def page_documents(self, collection_name, limit, start_after=None, fields=None):
+        raise NotImplementedError
+
+    # Function to follow changes to a collection: callback([(change, StoredDocument), ...])
+    # is called from a background thread, with change "added", "modified" or "removed";
+    # the first call lists every existing document as "added". Returns a handle whose
+    # unsubscribe() stops the watch. By default new writes are polled for.
+    def watch(self, collection_name, callback):
+        return _PollingWatch(self, collection_name, callback)
+
+    @abstractmethod
+    def count(self, collection_name):
+        raise NotImplementedError
+
+    @abstractmethod
+    def list_collections(self):
+        raise NotImplementedError
+
+    # Function to prepare connections in the background; a no-op unless the backend is remote
+    def warm_up(self):
+        pass
+
+class FirestoreStorage(Storage):
+    def __init__(self, db=None):
+        # Resolved on first use so that creating the backend does not initialize Firebase
+        self._db = db
+
+    @property
+    def db(self):
+        return self._db or get_db()
+
+    # Each chunk of up to 500 writes is one atomic batch commit; timestamps are set by
+    # the Firestore server
+    def bulk_put(self, writes):
+        from firebase_admin import firestore
+        db = self.db
+        for start in range(0, len(writes), FIRESTORE_BATCH_LIMIT):
+            batch = db.batch()
+            for collection_name, document_id, document in writes[start:start + FIRESTORE_BATCH_LIMIT]:
+                batch.set(db.collection(collection_name).document(document_id), _stamped(document, firestore.SERVER_TIMESTAMP))
+            batch.commit()
+
+    def scan_documents(self, collection_name):
+        return (
+            StoredDocument(snapshot.id, snapshot.to_dict(), snapshot.update_time)
+            for snapshot in self.db.collection(collection_name).stream()
+        )
+
+    def scan_since(self, collection_name, updated_after):
+        from google.cloud.firestore_v1.base_query import FieldFilter
+        query = (
+            self.db.collection(collection_name)
+            .where(filter=FieldFilter(UPDATED_FIELD, ">", updated_after))
+            .order_by(UPDATED_FIELD)
+        )
+        return (StoredDocument(snapshot.id, snapshot.to_dict(), snapshot.update_time) for snapshot in query.stream())
+
+    def query_by_arm(self, collection_name, arm):
+        from google.cloud.firestore_v1.base_query import FieldFilter
+        query = self.db.collection(collection_name).where(filter=FieldFilter("arm", "==", arm))
+        return (doc.to_dict() for doc in query.stream())
+
+    # An ordered query with a cursor: each page reads `limit` documents however far into
+    # the collection it is, and select() only downloads the requested fields
+    def page_documents(self, collection_name, limit, start_after=None, fields=None):
+        from google.cloud.firestore_v1.field_path import FieldPath
+        query = self.db.collection(collection_name).order_by(FieldPath.document_id()).limit(limit)
+        if start_after is not None:
+            query = query.start_after({FieldPath.document_id(): start_after})
+        if fields is not None:
+            query = query.select([FieldPath(field).to_api_repr() for field in fields])
+        return [StoredDocument(snapshot.id, snapshot.to_dict() or {}, snapshot.update_time) for snapshot in query.stream()]
+
+    # A snapshot listener: Firestore pushes only the changed documents after the initial
+    # snapshot, so a watch costs one read per change instead of repeated scans
+    def watch(self, collection_name, callback):
+        def on_snapshot(_documents, changes, _read_time):
+            callback([
+                (change.type.name.lower(), StoredDocument(change.document.id, change.document.to_dict(), change.document.update_time))
+                for change in changes
+            ])
+        return self.db.collection(collection_name).on_snapshot(on_snapshot)
+
+    # Server-side count aggregation; no documents are downloaded
+    def count(self, collection_name):
+        return self.db.collection(collection_name).count().get()[0][0].value
+
+    def list_collections(self):
+        return [collection.id for collection in self.db.collections()]
+
+    def warm_up(self):
+        warm_up_client()
+
+class SQLiteStorage(Storage):
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS documents (
+        collection TEXT NOT NULL,
+        id TEXT NOT NULL,
+        arm TEXT,
+        submitted_at TEXT,
+        updated_at REAL,
+        data TEXT NOT NULL,
+        PRIMARY KEY (collection, id)
+    );
+    CREATE INDEX IF NOT EXISTS documents_arm ON documents (collection, arm, submitted_at);
+    CREATE INDEX IF NOT EXISTS documents_updated ON documents (collection, updated_at);
+    -- Update time of the last write; every write commits with a later one
+    CREATE TABLE IF NOT EXISTS write_clock (
+        id INTEGER PRIMARY KEY CHECK (id = 0),
+        updated_at REAL NOT NULL
+    );
+    """
+
+    def __init__(self, path=STORAGE_PATH):
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            columns = [row[1] for row in self._conn.execute("PRAGMA table_info(documents)")]
+            if columns and "submitted_at" not in columns:
+                # Files from before timestamps were indexed
+                self._conn.execute("DROP INDEX IF EXISTS documents_arm")
+                self._conn.execute("ALTER TABLE documents ADD COLUMN submitted_at TEXT")
+                self._conn.execute("ALTER TABLE documents ADD COLUMN updated_at REAL")
+            self._conn.executescript(self.SCHEMA)
+
+    # The update time is taken inside the write transaction, after BEGIN IMMEDIATE has
+    # locked the file against other writers (also in other processes), and is later than
+    # the last write's. Update times therefore follow commit order, which scan_since() and
+    # the watch rely on; a write that started earlier cannot commit with an older time.
+    def bulk_put(self, writes):
+        # The connection context commits, or rolls back if the insert fails, so one failed
+        # write does not leave the shared connection inside an open transaction
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._conn.execute("SELECT updated_at FROM write_clock WHERE id = 0").fetchone()
+            if row is None:
+                # Files from before the write clock
+                row = self._conn.execute("SELECT MAX(updated_at) FROM documents").fetchone()
+            last = None if row[0] is None else datetime.fromtimestamp(row[0], timezone.utc)
+            now = _next_write_time(last)
+            rows = []
+            for collection_name, document_id, document in writes:
+                document = _stamped(document, now)
+                submitted_at = document[TIMESTAMP_FIELD]
+                rows.append((
+                    collection_name,
+                    document_id,
+                    document.get("arm"),
+                    submitted_at.isoformat() if isinstance(submitted_at, datetime) else submitted_at,
+                    now.timestamp(),
+                    _encode(document),
+                ))
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO documents (collection, id, arm, submitted_at, updated_at, data) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.execute("INSERT OR REPLACE INTO write_clock (id, updated_at) VALUES (0, ?)", (now.timestamp(),))
+
+    # Read in chunks of SCAN_CHUNK_SIZE rows in document ID order, so a scan holds one chunk
+    # in memory at a time and does not keep the connection locked while the caller works
+    # through it. Paging on the (collection, id) key, not rowid, means a document rewritten
+    # during the scan (INSERT OR REPLACE gives it a new rowid) is still returned once.
+    SCAN_CHUNK_SIZE = 1000
+
+    def scan_documents(self, collection_name):
+        last_id = ""
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    "SELECT id, data, updated_at FROM documents WHERE collection = ? AND id > ? ORDER BY id LIMIT ?",
+                    (collection_name, last_id, self.SCAN_CHUNK_SIZE),
+                ).fetchall()
+            for last_id, data, updated_at in rows:
+                yield StoredDocument(last_id, _decode(data), datetime.fromtimestamp(updated_at or 0, timezone.utc))
+            if len(rows) < self.SCAN_CHUNK_SIZE:
+                return
+
+    def scan_since(self, collection_name, updated_after):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, data, updated_at FROM documents WHERE collection = ? AND updated_at > ? ORDER BY updated_at",
+                (collection_name, updated_after.timestamp()),
+            ).fetchall()
+        return (
+            StoredDocument(document_id, _decode(data), datetime.fromtimestamp(updated_at, timezone.utc))
+            for document_id, data, updated_at in rows
+        )
+
+    # Served by the (collection, id) primary key, so later pages cost the same as the first
+    def page_documents(self, collection_name, limit, start_after=None, fields=None):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT id, data, updated_at FROM documents WHERE collection = ? AND id > ? ORDER BY id LIMIT ?",
+                (collection_name, "" if start_after is None else start_after, limit),
+            ).fetchall()
+        return [
+            StoredDocument(document_id, _select(_decode(data), fields), datetime.fromtimestamp(updated_at or 0, timezone.utc))
+            for document_id, data, updated_at in rows
+        ]
+
+    def query_by_arm(self, collection_name, arm):
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM documents WHERE collection = ? AND arm = ? ORDER BY rowid", (collection_name, arm)
+            ).fetchall()
+        return (_decode(data) for (data,) in rows)
+
+    def count(self, collection_name):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM documents WHERE collection = ?", (collection_name,)).fetchone()[0]
+
+    def list_collections(self):
+        with self._lock:
+            return [name for (name,) in self._conn.execute("SELECT DISTINCT collection FROM documents ORDER BY collection")]
+
+class MemoryStorage(Storage):
+    def __init__(self):
+        # {collection: {id: StoredDocument}}
+        self._collections = {}
+        self._lock = threading.Lock()
+        self._last_write = None
+
+    # The update time is taken under the lock and is later than the last write's, so
+    # update times follow commit order
+    def bulk_put(self, writes):
+        with self._lock:
+            now = self._last_write = _next_write_time(self._last_write)
+            for collection_name, document_id, document in writes:
+                stored = StoredDocument(document_id, dict(_stamped(document, now)), now)
+                self._collections.setdefault(collection_name, {})[document_id] = stored
+
+    # Copies are taken under the lock, so iterating never races a concurrent write
+    def scan_documents(self, collection_name):
+        with self._lock:
+            return [stored._replace(data=dict(stored.data)) for stored in self._collections.get(collection_name, {}).values()]
+
+    def scan_since(self, collection_name, updated_after):
+        return sorted(
+            (stored for stored in self.scan_documents(collection_name) if stored.updated_at > updated_after),
+            key=lambda stored: stored.updated_at,
+        )
+
+    def page_documents(self, collection_name, limit, start_after=None, fields=None):
+        with self._lock:
+            documents = self._collections.get(collection_name, {})
+            ids = sorted(document_id for document_id in documents if start_after is None or document_id > start_after)[:limit]
+            return [documents[document_id]._replace(data=_select(documents[document_id].data, fields)) for document_id in ids]
+
+    def query_by_arm(self, collection_name, arm):
+        return [document for document in self.scan(collection_name) if document.get("arm") == arm]
+
+    def count(self, collection_name):
+        with self._lock:
+            return len(self._collections.get(collection_name, {}))
+
+    def list_collections(self):
+        with self._lock:
+            return sorted(name for name, documents in self._collections.items() if documents)
+
+BACKENDS = {
+    "firestore": FirestoreStorage,
+    "sqlite": SQLiteStorage,
+    "memory": MemoryStorage,
+}
+
+# Function to get the process-wide storage backend selected by SURVEY_STORAGE_BACKEND
+def get_storage():
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                if STORAGE_BACKEND not in BACKENDS:
+                    raise ValueError(f"Unknown storage backend {STORAGE_BACKEND!r}, expected one of {', '.join(BACKENDS)}")
+                _storage = BACKENDS[STORAGE_BACKEND]()
+    return _storage
@@ -0,0 +1,23 @@
+import streamlit as st
+
+# Style registry: components declare the CSS they need with require_style(), duplicates
+# are dropped, and a single <style> block is written at the top of the page per rerun.
+
+STYLESHEET_KEY = "_stylesheet"
+
+# Function to start a new stylesheet for this rerun; returns the slot at the top of the page
+def begin_stylesheet():
+    st.session_state[STYLESHEET_KEY] = []
+    return st.empty()
+
+# Function to declare CSS needed by a component (no-op if already declared this rerun)
+def require_style(css):
+    sheet = st.session_state.setdefault(STYLESHEET_KEY, [])
+    if css not in sheet:
+        sheet.append(css)
+
+# Function to write every declared block as one stylesheet into the slot from begin_stylesheet()
+def render_stylesheet(slot):
+    sheet = st.session_state.get(STYLESHEET_KEY, [])
+    if sheet:
+        slot.markdown(f"<style>\n{''.join(sheet)}</style>", unsafe_allow_html=True)
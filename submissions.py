@@ -0,0 +1,262 @@
+import atexit
+import bisect
+import os
+import queue
+import threading
+import time
+import uuid
+
+from outbox import Outbox
+from storage import get_storage
+
+# Background writer for survey submissions. Submit commits the document to the local
+# outbox (outbox.py), hands it to a bounded in-process queue and the respondent moves
+# straight to the Success page; worker threads write it to the storage backend (storage.py).
+# Each worker coalesces whatever submissions are queued, from all sessions, into one batch
+# commit. Failed writes stay in the outbox and are replayed with backoff. Tune with
+# SURVEY_WRITER_QUEUE_SIZE, SURVEY_WRITER_THREADS, SURVEY_BATCH_MAX_SIZE and
+# SURVEY_BATCH_WINDOW_MS.
+WRITER_QUEUE_SIZE = int(os.environ.get("SURVEY_WRITER_QUEUE_SIZE", "1000"))
+WRITER_THREADS = int(os.environ.get("SURVEY_WRITER_THREADS", "4"))
+# How long Submit waits for room in a full queue before writing on its own thread
+ENQUEUE_TIMEOUT = 0.05
+# How long shutdown waits for queued submissions to be written
+DRAIN_TIMEOUT = float(os.environ.get("SURVEY_WRITER_DRAIN_TIMEOUT", "30"))
+# A batch is committed once it holds BATCH_MAX_SIZE writes (Firestore allows 500 per
+# commit) or BATCH_WINDOW seconds after its first submission arrived, whichever is first
+BATCH_MAX_SIZE = min(500, int(os.environ.get("SURVEY_BATCH_MAX_SIZE", "500")))
+BATCH_WINDOW = int(os.environ.get("SURVEY_BATCH_WINDOW_MS", "50")) / 1000
+# Seconds between scans of the outbox for entries due for a retry
+REPLAY_INTERVAL = 5
+# Upper bounds (ms) of the latency histogram buckets; one overflow bucket follows
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+_writer = None
+_writer_lock = threading.Lock()
+
+# Function to write [(collection, document_id, document), ...] to the configured backend in
+# one batch. Each write is a keyed upsert, so writing the same submission twice (a
+# double-clicked Submit, a retry or an outbox replay) leaves a single document.
+def write_batch_to_storage(writes):
+    get_storage().bulk_put(writes)
+
+class SubmissionWriter:
+    def __init__(self, write_batch=write_batch_to_storage, queue_size=WRITER_QUEUE_SIZE, threads=WRITER_THREADS,
+                 outbox=None, batch_size=BATCH_MAX_SIZE, batch_window=BATCH_WINDOW):
+        self._write_batch = write_batch
+        self._outbox = outbox
+        self._batch_size = batch_size
+        self._batch_window = batch_window
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._lock = threading.Lock()
+        self._closed = False
+        self._stopped = threading.Event()
+        self.counters = {
+            "submitted": 0, "written": 0, "failed": 0, "written_inline": 0, "deferred": 0, "replayed": 0, "commits": 0,
+        }
+        # Histograms: time each submission spent queued and time each batch commit took
+        self.histograms = {
+            "queue_wait_ms": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+            "write_ms": [0] * (len(LATENCY_BUCKETS_MS) + 1),
+        }
+        self._workers = [
+            threading.Thread(target=self._work, name=f"submission-writer-{i}", daemon=True)
+            for i in range(threads)
+        ]
+        for thread in self._workers:
+            thread.start()
+        if outbox is not None:
+            threading.Thread(target=self._replay, name="submission-replayer", daemon=True).start()
+
+    # Queue a document for writing; returns without waiting for the backend.
+    # If the queue stays full (or the writer is shut down) the document is left in the
+    # outbox for the replayer, or without an outbox written on the caller's thread, so a
+    # submission is never dropped.
+    # Submissions without a document_id get a fresh one here.
+    def submit(self, collection_name, document, document_id=None):
+        document_id = document_id or str(uuid.uuid4())
+        entry_id = self._append_to_outbox(collection_name, document_id, document)
+        item = (entry_id, collection_name, document_id, document, time.perf_counter())
+        with self._lock:
+            self.counters["submitted"] += 1
+        if not self._closed:
+            try:
+                self._queue.put(item, timeout=ENQUEUE_TIMEOUT)
+                return
+            except queue.Full:
+                pass
+        if entry_id is not None:
+            self._outbox.release(entry_id)
+            with self._lock:
+                self.counters["deferred"] += 1
+            return
+        with self._lock:
+            self.counters["written_inline"] += 1
+        self._process([item])
+
+    def _append_to_outbox(self, collection_name, document_id, document):
+        if self._outbox is None:
+            return None
+        try:
+            return self._outbox.append(collection_name, document_id, document)
+        except Exception as e:
+            # Still write it, just without the durable copy
+            print(f"Error adding a submission to the outbox: {e}")
+            return None
+
+    # Replayer thread: queue outbox entries that are due (failed earlier, deferred, or left
+    # over from a previous process) while there is room in the queue
+    def _replay(self):
+        while not self._stopped.wait(REPLAY_INTERVAL):
+            room = self._queue.maxsize - self._queue.qsize()
+            if room <= 0:
+                continue
+            try:
+                entries = self._outbox.claim_due(limit=room)
+            except Exception as e:
+                print(f"Error reading the submission outbox: {e}")
+                continue
+            for entry_id, collection_name, document_id, document in entries:
+                try:
+                    self._queue.put_nowait((entry_id, collection_name, document_id, document, time.perf_counter()))
+                except queue.Full:
+                    self._outbox.release(entry_id)
+                    continue
+                with self._lock:
+                    self.counters["replayed"] += 1
+
+    # Worker thread: take the next submission, then keep collecting until the batch is full
+    # or its window has passed, and commit it
+    def _work(self):
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            if item is None:
+                self._queue.task_done()
+                return
+            batch = [item]
+            deadline = time.monotonic() + self._batch_window
+            while len(batch) < self._batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+            try:
+                self._process(batch)
+            finally:
+                for _ in range(len(batch) + stopping):
+                    self._queue.task_done()
+
+    # Commit a batch. When a commit fails the batch is split in half and each half retried,
+    # down to single documents, so one rejected submission does not hold back the others
+    # coalesced with it; only the documents that still fail are marked failed. If the first
+    # two single-document writes fail before anything has been written, the backend is
+    # taken to be down and the rest of the batch is marked failed without further attempts.
+    def _process(self, batch):
+        started = time.perf_counter()
+        pending = [batch]
+        delivered, failed = [], []
+        commits = single_failures = 0
+        backend_down = None
+        while pending:
+            part = pending.pop()
+            if backend_down is not None:
+                failed.append((part, backend_down))
+                continue
+            commits += 1
+            try:
+                self._write_batch([(collection_name, document_id, document) for _, collection_name, document_id, document, _ in part])
+                delivered.extend(part)
+                single_failures = None  # Something was written, so the backend is up
+            except Exception as e:
+                print(f"Error saving data ({len(part)} documents): {e}")
+                if len(part) > 1:
+                    middle = len(part) // 2
+                    pending += [part[middle:], part[:middle]]
+                    continue
+                failed.append((part, e))
+                if single_failures is not None:
+                    single_failures += 1
+                    if single_failures >= 2:
+                        backend_down = e
+        self._record_outcome(delivered, failed)
+        finished = time.perf_counter()
+        with self._lock:
+            self.counters["written"] += len(delivered)
+            self.counters["failed"] += sum(len(part) for part, _ in failed)
+            self.counters["commits"] += commits
+            for *_, enqueued_at in batch:
+                self._observe("queue_wait_ms", (started - enqueued_at) * 1000)
+            self._observe("write_ms", (finished - started) * 1000)
+
+    # Mark delivered entries in the outbox and schedule a retry of the failed ones
+    def _record_outcome(self, delivered, failed):
+        if self._outbox is None:
+            return
+        try:
+            delivered_ids = [item[0] for item in delivered if item[0] is not None]
+            if delivered_ids:
+                self._outbox.mark_delivered(delivered_ids)
+            for part, error in failed:
+                failed_ids = [item[0] for item in part if item[0] is not None]
+                if failed_ids:
+                    self._outbox.mark_failed(failed_ids, error)
+        except Exception as outbox_error:
+            print(f"Error updating the submission outbox: {outbox_error}")
+
+    def _observe(self, histogram, value_ms):
+        self.histograms[histogram][bisect.bisect_left(LATENCY_BUCKETS_MS, value_ms)] += 1
+
+    # Function to get a snapshot of queue depth, counters and latency histograms
+    def stats(self):
+        labels = [f"<={bound}" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}"]
+        outbox_pending = self._outbox.counts().get("pending", 0) if self._outbox else None
+        with self._lock:
+            return {
+                "queue_depth": self._queue.qsize(),
+                "outbox_pending": outbox_pending,
+                **self.counters,
+                **{name: dict(zip(labels, counts)) for name, counts in self.histograms.items()},
+            }
+
+    # Stop accepting work and wait for queued submissions to be written.
+    # Returns the number of submissions still queued when the timeout ran out; with an
+    # outbox they stay pending there and are replayed by the next process.
+    def shutdown(self, timeout=DRAIN_TIMEOUT):
+        self._closed = True
+        self._stopped.set()
+        deadline = time.monotonic() + timeout
+        for _ in self._workers:
+            try:
+                self._queue.put(None, timeout=max(0, deadline - time.monotonic()))
+            except queue.Full:
+                break
+        for thread in self._workers:
+            thread.join(max(0, deadline - time.monotonic()))
+        return sum(1 for item in list(self._queue.queue) if item is not None)
+
+# Function to get the process-wide writer, starting it on first use.
+# It is drained when the server process exits.
+def get_writer():
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                try:
+                    outbox = Outbox()
+                except Exception as e:
+                    print(f"Submission outbox unavailable, writing without it: {e}")
+                    outbox = None
+                _writer = SubmissionWriter(outbox=outbox)
+                atexit.register(_drain_on_exit, _writer)
+    return _writer
+
+def _drain_on_exit(writer):
+    left = writer.shutdown()
+    print(f"Submission writer stopped: {writer.stats()}")
+    if left:
+        print(f"{left} submissions were not written before shutdown")
@@ -0,0 +1,259 @@
+import os
+from collections import namedtuple
+
+# Declarative questionnaire spec shared by both study arms (bias_test.py and control_group_app.py).
+# Each entry has a stable ID, the page it appears on, its text (a dict when the arms word it
+# differently), the widget type, options/params for the widget, and an optional validation rule.
+# The spec is compiled once at import into per-arm page lists that main() dispatches on directly.
+
+ARMS = ("bias", "control")
+
+# Form mode: each page's inputs are collected in one st.form and submitted together by the
+# navigation buttons, so a page costs one rerun instead of one per widget change.
+# Enable with SURVEY_FORM_MODE=1.
+FORM_MODE = os.environ.get("SURVEY_FORM_MODE", "0") == "1"
+
+DESIGNATIONS = [
+    "Director/Manager",
+    "VP/Executive",
+    "Procurement Specialist",
+    "Supply Chain Analyst",
+    "Operations Manager",
+    "Quality Engineer",
+    "Financial Analyst",
+    "Consultant",
+    "Logistics Coordinator",
+    "Student",
+    "Professor/Researcher",
+    "Other"
+]
+
+# Suppliers of the Q3 allocation and the widget keys of their sliders
+ALLOCATION_SUPPLIERS = ("Supplier A", "Supplier B", "Supplier C")
+ALLOCATION_SLIDER_KEYS = ("supplier_a_slider", "supplier_b_slider", "supplier_c_slider")
+
+IMPORTANCE_FACTORS = [
+    "Initial price",
+    "Reliability",
+    "Lead time",
+    "Lead variability",
+    "Minimum order",
+    "Certification",
+    "Warranty"
+]
+
+QUESTION_SPEC = [
+    # Page 1: demographics
+    {
+        "id": "first_name",
+        "page": "Page 1",
+        "text": "First Name (*)",
+        "widget": "text",
+        "validation": "required",
+        "error": "First Name is mandatory. Please fill it before proceeding."
+    },
+    {"id": "last_name", "page": "Page 1", "text": "Last Name", "widget": "text"},
+    {"id": "email", "page": "Page 1", "text": "Email", "widget": "text"},
+    {"id": "designation", "page": "Page 1", "text": "Designation", "widget": "dropdown", "options": DESIGNATIONS},
+
+    # Page 2: supplier decision
+    {
+        "id": "Q1",
+        "page": "Page 2",
+        "text": "Q1. Based on the information provided, which supplier would you select for AeroConnect Airlines?",
+        "widget": "choice",
+        "options": ["Supplier A", "Supplier B", "Supplier C"],
+        "params": {"horizontal": True}
+    },
+    {
+        "id": "Q2",
+        "page": "Page 2",
+        "text": {
+            "bias": "Q2. Rate your confidence in this decision, considering the potential impact on aircraft availability (1 = Not at all confident, 10 = Extremely confident)",
+            "control": "Q2. Rate your confidence in this decision: (1 = Not at all confident, 10 = Extremely confident)"
+        },
+        "widget": "slider",
+        "params": {"min_value": 1, "max_value": 10}
+    },
+    {
+        "id": "Q3",
+        "page": "Page 2",
+        "text": "Q3. If you had to distribute AeroConnect's annual orders to manage supply risk, what percentage would you allocate to each supplier? (Total must equal 100%)",
+        "widget": "allocation",
+        "validation": "allocation_total",
+        "error": "Please ensure the total allocation equals 100% before proceeding."
+    },
+
+    # Page 3: Likert statements (1-5)
+    {
+        "id": "Q4",
+        "page": "Page 3",
+        "text": {
+            "bias": "Q4. Selecting a supplier with lower reliability exposes AeroConnect to significant operational disruptions, potential regulatory scrutiny, and passenger compensation claims.",
+            "control": "Q4. I believe selecting a supplier with a lower reliability poses a risk to AeroConnect’s operations."
+        },
+        "widget": "slider",
+        "params": {"min_value": 1, "max_value": 5}
+    },
+    {
+        "id": "Q5",
+        "page": "Page 3",
+        "text": {
+            "bias": "Q5. The hidden costs from selecting the lowest-price supplier (emergency shipments, flight cancellations, maintenance complications) often exceed the initial savings.",
+            "control": "Q5. I am concerned about potential hidden costs that might arise from selecting the lowest-price supplier."
+        },
+        "widget": "slider",
+        "params": {"min_value": 1, "max_value": 5}
+    },
+    {
+        "id": "Q6",
+        "page": "Page 3",
+        "text": {
+            "bias": "Q6. Paying more upfront for quality avionics units protects against costly flight cancellations, emergency maintenance, and damage to AeroConnect's safety reputation.",
+            "control": "Q6. I would rather pay more upfront for avionics units than risk unexpected costs later."
+        },
+        "widget": "slider",
+        "params": {"min_value": 1, "max_value": 5}
+    },
+    {
+        "id": "Q7",
+        "page": "Page 3",
+        "text": {
+            "bias": "Q7. Longer and variable lead times increase the risk of grounded aircraft and lost revenue when unexpected maintenance needs arise.",
+            "control": "Q7. I am comfortable with longer and more variable lead times if it results in significant cost savings."
+        },
+        "widget": "slider",
+        "params": {"min_value": 1, "max_value": 5}
+    },
+
+    # Page 4: follow-up scenarios and importance ratings
+    {
+        "id": "Q8",
+        "page": "Page 4",
+        "text": {
+            "bias": "Q8. If Supplier B improved their reliability rating to 97% but increased their price by 10%, would you change your original supplier selection? (Note- Each 1% decrease in reliability has historically corresponded to a 15% increase in maintenance issues)",
+            "control": "Q8. If Supplier B improved their reliability rating to 97% (equal to Supplier A) but increased their price by 10%, would you change your original supplier selection?"
+        },
+        "widget": "choice",
+        "options": [
+            "Yes, I would switch to Supplier B",
+            "No, I would stay with my original choice",
+            "I originally chose Supplier B and would still choose them"
+        ],
+        "params": {"horizontal": False}
+    },
+    {
+        "id": "Q9",
+        "page": "Page 4",
+        "text": {
+            "bias": "Q9. What is the minimum reliability percentage you would consider acceptable? (Each reliability percentage point below 99% correlates with approximately 3 additional flight cancellations per year)",
+            "control": "Q9. What is the minimum reliability percentage you would consider acceptable for these avionics control units?"
+        },
+        "widget": "choice",
+        "options": ["99% or higher", "97-98%", "95-96%", "90-94%", "Below 90%"],
+        "params": {"horizontal": True}
+    },
+    {
+        "id": "Q10",
+        "page": "Page 4",
+        "text": {
+            "bias": "Q10. If a delivery delay grounds aircraft and disrupts operations, which option would you prefer?",
+            "control": "Q10. If a delay in avionics unit delivery would ground an aircraft, which option would you prefer?"
+        },
+        "widget": "choice",
+        "options": [
+            "Pay a 35% premium for emergency shipments",
+            "Cancel revenue-generating flights until delivery",
+            "Maintain a larger safety stock (20% increase in inventory costs)"
+        ],
+        "params": {"horizontal": False}
+    },
+    {
+        "id": "Q11",
+        "page": "Page 4",
+        "text": "Q11. Rate the importance of each factor in your supplier selection decision: (1 = Not Important, 5 = Extremely Important)",
+        "widget": "importance_matrix",
+        "options": IMPORTANCE_FACTORS
+    },
+    {
+        "id": "Q12",
+        "page": "Page 4",
+        "text": {
+            "bias": "Q12. Which attribute would you be most willing to compromise on to improve reliability by 2%?",
+            "control": "Q12. Which attribute would you be most willing to alter to improve reliability by 2%?"
+        },
+        "widget": "choice",
+        "options": ["Price", "Lead time", "Lead time variability", "Minimum order quantity", "Warranty period"],
+        "params": {"horizontal": False}
+    },
+
+    # Page 5: long-term considerations
+    {
+        "id": "Q13",
+        "page": "Page 5",
+        "text": {
+            "bias": "Q13. Would you be willing to commit to a 2-year contract with your chosen supplier in exchange for a 12% price reduction? (Note- This would protect against any potential future price increases due to market volatility)",
+            "control": "Q13. Would you be willing to commit to a 2-year contract with your chosen supplier in exchange for a 12% price reduction?"
+        },
+        "widget": "choice",
+        "options": ["Yes", "No", "Unsure"],
+        "params": {"horizontal": True}
+    },
+    {
+        "id": "Q14",
+        "page": "Page 5",
+        "text": "Q14. How much would you be willing to invest in additional quality testing equipment that could detect potential defects before installation?",
+        "widget": "choice",
+        # "$" is escaped so the range options are not rendered as LaTeX
+        "options": [
+            "$0 (not willing to invest)",
+            "Up to $50,000",
+            "\\$50,001 - \\$100,000",
+            "\\$100,001 - \\$200,000",
+            "Over $200,000"
+        ],
+        "params": {"horizontal": False}
+    },
+]
+
+PAGE_ORDER = ["Page 1", "Page 2", "Page 3", "Page 4", "Page 5", "Success"]
+
+# Compiled question as used at render time; text is already resolved for the arm
+Question = namedtuple("Question", ["id", "text", "widget", "options", "params", "validation", "error"])
+
+# Function to compile the spec for one arm into {page: [Question, ...]}
+def compile_spec(arm):
+    pages = {page: [] for page in PAGE_ORDER}
+    for entry in QUESTION_SPEC:
+        text = entry["text"][arm] if isinstance(entry["text"], dict) else entry["text"]
+        pages[entry["page"]].append(Question(
+            id=entry["id"],
+            text=text,
+            widget=entry["widget"],
+            options=tuple(entry.get("options", ())),
+            params=entry.get("params", {}),
+            validation=entry.get("validation"),
+            error=entry.get("error")
+        ))
+    return pages
+
+# Compiled once at import: {arm: {page: [Question, ...]}}
+PAGES = {arm: compile_spec(arm) for arm in ARMS}
+
+# Function to get the {page: [question text, ...]} layout used for navigation
+def question_texts(arm):
+    return {page: [q.text for q in page_questions] for page, page_questions in PAGES[arm].items()}
+
+# Validation rules: each returns True when the answer is acceptable
+VALIDATORS = {
+    "required": lambda question, answers, state: str(answers.get(question.text, "")).strip() != "",
+    # Only fails once the allocation sliders have reported a total that is not 100%
+    "allocation_total": lambda question, answers, state: state.get("allocation_valid", True),
+}
+
+# Function to validate one page; returns the first error message or "" when the page is valid
+def validate_page(arm, page, answers, state):
+    for question in PAGES[arm][page]:
+        if question.validation and not VALIDATORS[question.validation](question, answers, state):
+            return question.error
+    return ""
@@ -0,0 +1,404 @@
+import streamlit as st
+
+from styles import require_style
+from survey_spec import ALLOCATION_SLIDER_KEYS, FORM_MODE, PAGES, validate_page
+
+# Survey widgets and page navigation shared by both study arms (bias_test.py and
+# control_group_app.py). Each widget type of the question spec (survey_spec.py) has a
+# render function in WIDGETS; the apps draw a page by dispatching on its questions.
+# Functions that depend on the arm's spec take the arm as a parameter.
+
+RADIO_CSS = """
+.stRadio > div {
+    background-color: pink;
+    padding: 10px;
+    border-radius: 5px;
+}
+"""
+
+# Function to display multiple-choice questions horizontally with optimized styling
+def display_horizontal_choice(options, key, horizontal=True):
+    require_style(RADIO_CSS)
+    selected_option = st.radio(
+        "",
+        options,
+        key=key,
+        horizontal=horizontal
+    )
+    return selected_option
+
+DROPDOWN_CSS = """
+/* Style the selectbox container */
+div[data-testid="stSelectbox"] {
+    background-color: pink;
+    padding: 2px;
+    border-radius: 2px;
+}
+
+/* Remove top margin/padding */
+div[data-testid="stSelectbox"] > div {
+    margin-top: 0px !important;
+    padding-top: -3px !important;
+}
+
+/* Target the actual dropdown button */
+div[data-baseweb="select"] > div:first-child {
+    background-color: pink !important;
+}
+
+/* Style the value display area */
+div[data-baseweb="select"] [data-baseweb="tag"] {
+    background-color: pink !important;
+}
+
+/* Style dropdown options */
+div[data-baseweb="popover"] ul,
+div[data-baseweb="popover"] li,
+div[data-baseweb="popover"] li:hover {
+    background-color: pink !important;
+}
+"""
+
+# Function to display a dropdown
+def display_dropdown(question, options, key):
+    require_style(DROPDOWN_CSS)
+    selected_option = st.selectbox(
+        "",
+        options,
+        key=key
+    )
+    return selected_option
+
+SLIDER_CSS = """
+div[data-testid="stSlider"] {
+    background-color: pink;
+    padding: 5px 20px;  /* Reduced padding */
+    margin-top: 0px !important;  /* Reduced top margin */
+    border-radius: 5px;
+}
+
+/* Adjusts the label and internal padding */
+div[data-testid="stSlider"] > div {
+    margin: 0px !important;
+    padding: 0px !important;
+}
+
+/* Reduce space between slider elements */
+div[data-testid="stSlider"] .stSlider {
+    gap: 2px !important;
+}
+"""
+
+# Function to display slider with reduced distance
+def display_slider(question, min_value, max_value, key):
+    # Apply white background and padding for better visibility
+    require_style(SLIDER_CSS)
+    # Create the slider
+    value = st.slider("", min_value=min_value, max_value=max_value, value=(min_value + max_value) // 2, key=key)
+    return value
+
+ALLOCATION_SLIDERS_CSS = """
+/* Target individual sliders but not their parent container */
+div[data-testid="column"] div[data-testid="stSlider"] {
+    background-color: pink;
+    padding: 5px 20px;
+    border-radius: 5px;
+}
+"""
+
+# Function to display percentage allocation using sliders
+# Runs as a fragment: dragging a slider reruns only this block and its running total
+@st.fragment
+def display_percentage_allocation_sliders():
+    st.markdown("<div style='margin-top: 5px;'></div>", unsafe_allow_html=True)
+    
+    # Initialize session state for percentages (only if not already set)
+    if "supplier_a_percent" not in st.session_state:
+        st.session_state.supplier_a_percent = 0
+    if "supplier_b_percent" not in st.session_state:
+        st.session_state.supplier_b_percent = 0
+    if "supplier_c_percent" not in st.session_state:
+        st.session_state.supplier_c_percent = 0
+        
+    # Define callback functions
+    def on_change_a():
+        st.session_state.supplier_a_percent = st.session_state.supplier_a_slider
+        
+    def on_change_b():
+        st.session_state.supplier_b_percent = st.session_state.supplier_b_slider
+        
+    def on_change_c():
+        st.session_state.supplier_c_percent = st.session_state.supplier_c_slider
+    
+    # Add CSS that targets only the individual slider containers
+    require_style(ALLOCATION_SLIDERS_CSS)
+    
+    # Create a row of three sliders
+    col1, col2, col3 = st.columns(3)
+    
+    # Use the sliders with on_change callbacks
+    with col1:
+        a_percent = st.slider(
+            "Supplier A",
+            min_value=0,
+            max_value=100,
+            step=5,
+            value=st.session_state.supplier_a_percent,
+            key=ALLOCATION_SLIDER_KEYS[0],
+            on_change=None if FORM_MODE else on_change_a
+        )
+    with col2:
+        b_percent = st.slider(
+            "Supplier B",
+            min_value=0,
+            max_value=100,
+            step=5,
+            value=st.session_state.supplier_b_percent,
+            key=ALLOCATION_SLIDER_KEYS[1],
+            on_change=None if FORM_MODE else on_change_b
+        )
+    with col3:
+        c_percent = st.slider(
+            "Supplier C",
+            min_value=0,
+            max_value=100,
+            step=5,
+            value=st.session_state.supplier_c_percent,
+            key=ALLOCATION_SLIDER_KEYS[2],
+            on_change=None if FORM_MODE else on_change_c
+        )
+    
+    # In form mode callbacks are not allowed, so take the submitted slider values directly
+    if FORM_MODE:
+        st.session_state.supplier_a_percent = a_percent
+        st.session_state.supplier_b_percent = b_percent
+        st.session_state.supplier_c_percent = c_percent
+
+    # Get values directly from session state
+    a_percent = st.session_state.supplier_a_percent
+    b_percent = st.session_state.supplier_b_percent
+    c_percent = st.session_state.supplier_c_percent
+    
+    # Display current allocation and total
+    total_percent = a_percent + b_percent + c_percent
+    
+    # Check if total exceeds 100%
+    if total_percent != 100:
+        color = "red"
+        warning_message = " (Please adjust to equal 100%)"
+    else:
+        color = "black"
+        warning_message = ""
+    
+    st.markdown(
+        f"""
+        <div style="padding: 5px; background-color: rgba(255, 255, 255);">
+            <p style="color: {color}; font-weight: 900; margin-bottom: 5px;">
+                Total: {total_percent}% (A: {a_percent}%, B: {b_percent}%, C: {c_percent}%){warning_message}
+            </p>
+        </div>
+        """,
+        unsafe_allow_html=True
+    )
+    
+    # Add this to session state for validation
+    st.session_state.allocation_valid = (total_percent == 100)
+    # Save the answers to session state
+    st.session_state.answers["Supplier A: in %"] = a_percent
+    st.session_state.answers["Supplier B: in %"] = b_percent
+    st.session_state.answers["Supplier C: in %"] = c_percent
+
+IMPORTANCE_MATRIX_CSS = """
+/* Style for the entire slider component including label */
+div[data-testid="stSlider"] {
+    background-color: pink;
+    padding: 10px;
+    border-radius: 5px;
+    margin-bottom: 10px;
+}
+"""
+
+# Function to display importance ratings with a 2x3 matrix of sliders for space optimization.
+# Runs as a fragment, so it saves its own answer: a fragment rerun does not return to main().
+@st.fragment
+def display_importance_ratings_matrix(question, factors, key):
+    # Add CSS for styling
+    require_style(IMPORTANCE_MATRIX_CSS)
+    
+    # Create a 2x3 matrix layout
+    ratings = {}
+    
+    # First row - 3 factors
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        # Use the label parameter to include the factor name
+        ratings[factors[0]] = st.slider(
+            label=factors[0],
+            min_value=1, 
+            max_value=5, 
+            value=3, 
+            key=f"{key}_{factors[0]}"
+        )
+    
+    with col2:
+        ratings[factors[1]] = st.slider(
+            label=factors[1],
+            min_value=1, 
+            max_value=5, 
+            value=3, 
+            key=f"{key}_{factors[1]}"
+        )
+    
+    with col3:
+        ratings[factors[2]] = st.slider(
+            label=factors[2],
+            min_value=1, 
+            max_value=5, 
+            value=3, 
+            key=f"{key}_{factors[2]}"
+        )
+    
+    # Second row - 4 factors
+    col4, col5, col6, col7 = st.columns(4)
+    with col4:
+        ratings[factors[3]] = st.slider(
+            label=factors[3],
+            min_value=1, 
+            max_value=5, 
+            value=3, 
+            key=f"{key}_{factors[3]}"
+        )
+    
+    with col5:
+        ratings[factors[4]] = st.slider(
+            label=factors[4],
+            min_value=1, 
+            max_value=5, 
+            value=3, 
+            key=f"{key}_{factors[4]}"
+        )
+    
+    with col6:
+        ratings[factors[5]] = st.slider(
+            label=factors[5],
+            min_value=1, 
+            max_value=5, 
+            value=3, 
+            key=f"{key}_{factors[5]}"
+        )
+    
+    with col7:
+        ratings[factors[6]] = st.slider(
+            label=factors[6],
+            min_value=1, 
+            max_value=5, 
+            value=3, 
+            key=f"{key}_{factors[6]}"
+        )
+    
+    st.session_state.answers[question] = ratings
+    return ratings
+
+TEXT_INPUT_CSS = """
+/* Style for the outer container */
+div[data-testid="stTextInput"] > div {
+    background-color: pink;
+    padding: 10px;
+    border-radius: 5px;
+    margin-bottom: 10px;
+}
+
+/* Style for the input field itself */
+div[data-testid="stTextInput"] input {
+    background-color: pink !important;
+    border: 1px solid #ffbbbb !important;
+}
+"""
+
+# Render functions for each widget type in the question spec
+def render_text(question):
+    # Add CSS for styling both the container and the input field with the same pink
+    require_style(TEXT_INPUT_CSS)
+    return st.text_input("", value=st.session_state.answers.get(question.text, ""), key=question.text)
+
+def render_dropdown(question):
+    return display_dropdown(question.text, list(question.options), key=question.text)
+
+def render_choice(question):
+    return display_horizontal_choice(list(question.options), key=question.text, horizontal=question.params["horizontal"])
+
+def render_slider(question):
+    return display_slider(question.text, question.params["min_value"], question.params["max_value"], key=question.text)
+
+def render_allocation(question):
+    display_percentage_allocation_sliders()
+
+def render_importance_matrix(question):
+    display_importance_ratings_matrix(question.text, list(question.options), key=question.text)
+
+# Dispatch table: widget type from the spec -> render function
+WIDGETS = {
+    "text": render_text,
+    "dropdown": render_dropdown,
+    "choice": render_choice,
+    "slider": render_slider,
+    "allocation": render_allocation,
+    "importance_matrix": render_importance_matrix,
+}
+
+# Function to copy the current page's widget values (per the spec of `arm`) into the answers. Navigation callbacks
+# run before the script, so this is how they see what was entered (or submitted in a form)
+# since the last run.
+def sync_answers_from_widgets(arm):
+    state = st.session_state
+    for question in PAGES[arm][state.page]:
+        if question.widget == "allocation":
+            percents = [state.get(key, 0) for key in ALLOCATION_SLIDER_KEYS]
+            for supplier, percent in zip("ABC", percents):
+                state[f"supplier_{supplier.lower()}_percent"] = percent
+                state.answers[f"Supplier {supplier}: in %"] = percent
+            if any(key in state for key in ALLOCATION_SLIDER_KEYS):
+                state.allocation_valid = (sum(percents) == 100)
+        elif question.widget == "importance_matrix":
+            factor_keys = {factor: f"{question.text}_{factor}" for factor in question.options}
+            if all(key in state for key in factor_keys.values()):
+                state.answers[question.text] = {factor: state[key] for factor, key in factor_keys.items()}
+        elif question.text in state:
+            state.answers[question.text] = state[question.text]
+
+# Navigation callbacks: the page changes before the next script run, so each click costs one run
+def go_to_previous_page(arm):
+    sync_answers_from_widgets(arm)
+    pages = list(PAGES[arm])
+    st.session_state.page = pages[pages.index(st.session_state.page) - 1]
+
+def go_to_next_page(arm):
+    sync_answers_from_widgets(arm)
+    # Validation rules for the current page come from the question spec
+    message = validate_page(arm, st.session_state.page, st.session_state.answers, st.session_state)
+    if message:
+        # Shown once by navigation_buttons() on the run that follows this click
+        st.session_state.navigation_error = message
+        return
+    pages = list(PAGES[arm])
+    st.session_state.page = pages[pages.index(st.session_state.page) + 1]
+
+# `save` is the app's save_to_firebase(answers, submission_id)
+def submit_survey(arm, save):
+    sync_answers_from_widgets(arm)
+    try:
+        save(st.session_state.answers, st.session_state.submission_id)
+    except Exception as e:
+        # Log the error but don't show it to the user
+        print(f"Error saving data to Firebase: {e}")
+
+    st.session_state.answers = {}
+    st.session_state.page = "Success"
+
+# Function to create a navigation button; in form mode it submits the page's form
+def page_button(column, label, **kwargs):
+    if FORM_MODE:
+        # Form submit buttons are identified by their form and label; they take no key
+        kwargs.pop("key", None)
+        return column.form_submit_button(label, **kwargs)
+    return column.button(label, **kwargs)
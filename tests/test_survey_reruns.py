@@ -0,0 +1,37 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+# Every Previous, Next and Submit click of the survey must cost exactly one script run, in
+# both arms and with SURVEY_FORM_MODE off and on. The walk is the one in
+# benchmarks/bench_survey_reruns.py (AppTest, in-memory storage); each case runs in a fresh
+# process because the form-mode flag is read at import.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCHMARK = os.path.join(ROOT, "benchmarks", "bench_survey_reruns.py")
+
+# Function to walk the survey in a child process and return its result
+def walk(app_file, form_mode):
+    completed = subprocess.run(
+        [sys.executable, BENCHMARK, app_file, form_mode],
+        env={**os.environ, "SURVEY_FORM_MODE": form_mode, "SURVEY_STORAGE_BACKEND": "memory"},
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        timeout=600,
+    )
+    assert completed.returncode == 0, completed.stderr
+    return json.loads(completed.stdout.splitlines()[-1])
+
+@pytest.mark.parametrize("form_mode", ["0", "1"], ids=["per-widget", "form"])
+@pytest.mark.parametrize("app_file", ["bias_test.py", "control_group_app.py"])
+def test_one_run_per_navigation_click(app_file, form_mode):
+    result = walk(app_file, form_mode)
+    # Next on pages 1-4, then Submit on page 5
+    assert result["navigation"] == [1, 1, 1, 1, 1]
+    assert result["page"] == "Success"
+    # Previous on pages 2-5
+    assert result["previous"] == {f"Page {page}": 1 for page in range(2, 6)}